@@ -0,0 +1,235 @@
+from Othello import game
+from OthelloPosition import OthelloPosition
+from SearchStatistics import SearchStatistics
+from SuperSmartEvaluator import SuperSmartEvaluator
+from EarlyGameEvaluator import EarlyGameEvalutor
+from PatternEvaluator import PatternEvaluator
+import argparse
+import json
+import sys
+import time
+
+DEFAULT_CORPUS = "benchmark_positions.txt"
+
+# Number of repetitions of each micro benchmark call.
+MICRO_REPEAT = 200
+
+
+def load_corpus(path):
+    """
+    Reads benchmark positions, one position string per line in the format read by OthelloPosition. Empty lines and
+    lines starting with # are skipped.
+    :param path: The corpus file.
+    :return: List of position strings.
+    :raises ValueError: If a line is not a valid position string.
+    """
+    positions = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if len(line) != 65 or line[0] not in 'WB' or set(line[1:]) - set('EOX'):
+                raise ValueError("%s:%d: not a position string" % (path, number))
+            positions.append(line)
+    return positions
+
+
+def fixed_depth(position_str, depth):
+    """
+    Searches a position to a fixed depth with a fresh engine.
+    :param position_str: The position.
+    :param depth: The depth.
+    :return: A dict with the best move, its value, the nodes, the nodes per second and the time to reach each depth.
+    """
+    engine = game(search_depth=1)
+    statistics = SearchStatistics()
+    engine.set_statistics(statistics)
+    engine.set_time_manager(None)
+    engine.set_endgame_solver(None)
+    engine.set_max_depth(depth)
+    action = engine.evaluate(OthelloPosition(position_str), float('inf'))
+    record = statistics.records[-1]
+
+    time_to_depth = {}
+    elapsed = 0.0
+    for iteration in record['iterations']:
+        elapsed += iteration['time']
+        time_to_depth[str(iteration['depth'])] = elapsed
+    return {'move': [action.row, action.col, action.is_pass_move], 'value': action.value, 'nodes': record['nodes'],
+            'nps': record['nps'], 'time_to_depth': time_to_depth}
+
+
+def fixed_time(position_str, time_limit):
+    """
+    Searches a position for a fixed time with a fresh engine.
+    :param position_str: The position.
+    :param time_limit: Time in seconds.
+    :return: A dict with the best move, the depth reached, the nodes and the nodes per second.
+    """
+    engine = game(search_depth=1)
+    statistics = SearchStatistics()
+    engine.set_statistics(statistics)
+    action = engine.evaluate(OthelloPosition(position_str), time.time() + time_limit)
+    record = statistics.records[-1]
+    return {'move': [action.row, action.col, action.is_pass_move], 'depth': record['depth'],
+            'nodes': record['nodes'], 'nps': record['nps'], 'method': record['method']}
+
+
+def __per_call(function, count):
+    """
+    Runs function MICRO_REPEAT times.
+    :return: Time per call in microseconds, count calls being made by each run of function.
+    """
+    started = time.perf_counter()
+    for i in range(MICRO_REPEAT):
+        function()
+    return (time.perf_counter() - started) * 1e6 / (MICRO_REPEAT * max(count, 1))
+
+
+def micro(positions):
+    """
+    Times the basic operations of the search on the corpus positions.
+    :param positions: List of position strings.
+    :return: A dict of microseconds per call: get_moves (generating the moves and their actions), make_move,
+    apply + undo, and evaluate for each evaluator.
+    """
+    boards = [OthelloPosition(position_str) for position_str in positions]
+    actions = [list(board.get_moves()[1]) for board in boards]
+    moves = sum(len(board_actions) for board_actions in actions)
+
+    def get_moves():
+        for board in boards:
+            list(board.get_moves()[1])
+
+    def make_move():
+        for board, board_actions in zip(boards, actions):
+            for action in board_actions:
+                board.make_move(action)
+
+    def apply_undo():
+        for board, board_actions in zip(boards, actions):
+            for action in board_actions:
+                board.apply(action)
+                board.undo()
+
+    results = {
+        'get_moves': __per_call(get_moves, len(boards)),
+        'make_move': __per_call(make_move, moves),
+        'apply_undo': __per_call(apply_undo, moves),
+    }
+    for name, evaluator in (('SuperSmartEvaluator', SuperSmartEvaluator()), ('EarlyGameEvalutor', EarlyGameEvalutor()),
+                            ('PatternEvaluator', PatternEvaluator())):
+        results[name] = __per_call(lambda: [evaluator.evaluate(board, None) for board in boards], len(boards))
+    return results
+
+
+def run(positions, depth, time_limit):
+    """
+    Runs the whole benchmark.
+    :param positions: List of position strings.
+    :param depth: Depth of the fixed depth searches.
+    :param time_limit: Time of the fixed time searches, 0 to skip them.
+    :return: The results as a dict, see compare.
+    """
+    results = {'depth': depth, 'time_limit': time_limit, 'micro': micro(positions), 'positions': {}}
+    for position_str in positions:
+        entry = {'fixed_depth': fixed_depth(position_str, depth)}
+        if time_limit > 0:
+            entry['fixed_time'] = fixed_time(position_str, time_limit)
+        results['positions'][position_str] = entry
+
+    total_nodes = sum(entry['fixed_depth']['nodes'] for entry in results['positions'].values())
+    total_time = sum(entry['fixed_depth']['time_to_depth'][str(depth)] for entry in results['positions'].values()
+                     if str(depth) in entry['fixed_depth']['time_to_depth'])
+    results['nps'] = total_nodes / total_time if total_time > 0 else 0.0
+    results['time_to_depth'] = total_time
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares benchmark results with a baseline from an earlier run.
+    :param results: Results of run.
+    :param baseline: Results of an earlier run, with the same depth.
+    :param tolerance: Allowed relative slowdown, e.g. 0.1 for 10%.
+    :return: List of regressions, as text. Changed best moves at the fixed depth are reported as well, since the
+    search is deterministic at a fixed depth.
+    """
+    problems = []
+    if results['depth'] != baseline['depth']:
+        return ["depth %d differs from the baseline depth %d" % (results['depth'], baseline['depth'])]
+
+    if results['nps'] < baseline['nps'] * (1 - tolerance):
+        problems.append("nodes/sec %.0f, baseline %.0f" % (results['nps'], baseline['nps']))
+    if results['time_to_depth'] > baseline['time_to_depth'] * (1 + tolerance):
+        problems.append("time to depth %d %.3fs, baseline %.3fs"
+                        % (results['depth'], results['time_to_depth'], baseline['time_to_depth']))
+    for name, value in results['micro'].items():
+        old = baseline['micro'].get(name)
+        if old is not None and value > old * (1 + tolerance):
+            problems.append("%s %.2fus per call, baseline %.2fus" % (name, value, old))
+
+    for position_str, entry in results['positions'].items():
+        old = baseline['positions'].get(position_str)
+        if old is not None and entry['fixed_depth']['move'] != old['fixed_depth']['move']:
+            problems.append("%s: best move %s, baseline %s"
+                            % (position_str, entry['fixed_depth']['move'], old['fixed_depth']['move']))
+    return problems
+
+
+def report(results, output):
+    """
+    Writes a summary of the results.
+    :param results: Results of run.
+    :param output: A text stream.
+    """
+    output.write("%-65s %8s %9s %9s %6s\n" % ("position", "move", "nodes", "nodes/s", "depth"))
+    for position_str, entry in results['positions'].items():
+        searched = entry['fixed_depth']
+        row, col, is_pass_move = searched['move']
+        move = "pass" if is_pass_move else "(%d,%d)" % (row, col)
+        depth = ''
+        if 'fixed_time' in entry:
+            timed = entry['fixed_time']
+            depth = 'solved' if timed['method'] == 'endgame' else timed['depth']
+        output.write("%s %8s %9d %9.0f %6s\n" % (position_str, move, searched['nodes'], searched['nps'], depth))
+    output.write("total: %.0f nodes/s, %.3fs to depth %d\n" % (results['nps'], results['time_to_depth'],
+                                                                results['depth']))
+    for name, value in results['micro'].items():
+        output.write("%s: %.2fus per call\n" % (name, value))
+
+
+def main(argv):
+    """
+    Command line entry point, run with --help for the options. Exits with status 1 if a regression against the
+    baseline was found.
+    :param argv: The command line arguments, without the program name.
+    """
+    parser = argparse.ArgumentParser(description="Othello search benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="file with position strings")
+    parser.add_argument("--depth", type=int, default=5, help="depth of the fixed depth searches")
+    parser.add_argument("--time", type=float, default=0.0, help="seconds per fixed time search, 0 to skip")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--save", help="write the results as JSON to this file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    results = run(load_corpus(args.corpus), args.depth, args.time)
+    report(results, sys.stdout)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for problem in problems:
+            print("REGRESSION " + problem)
+        if problems:
+            sys.exit(1)
+        print("No regressions against " + args.baseline)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,180 @@
+from OthelloPosition import OthelloPosition
+from OthelloAction import OthelloAction
+from OpeningBook import canonical_key, book_entry, write_book
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import os
+import sys
+
+# The search engine of a worker process, set up by _init_worker.
+_engine = None
+
+
+def _init_worker(depth, table_size):
+    """
+    Sets up a worker process: a search engine that deepens to a fixed depth, so a position gets the same score however
+    busy the machine is.
+    :param depth: Search depth.
+    :param table_size: Size of the transposition table of the worker in MB.
+    """
+    global _engine
+    # Imported here, the worker only needs the search engine once it runs
+    from Othello import game
+    _engine = game(search_depth=1, table_size=table_size)
+    _engine.set_time_manager(None)
+    _engine.set_max_depth(depth)
+
+
+def _score_position(position_str):
+    """
+    Searches a position with the engine of the worker.
+    :param position_str: The position, it must have a legal move.
+    :return: A tuple (position_str, row, col, value, depth) with the best move, its value and the depth searched.
+    """
+    _engine.set_search_depth(1)
+    _engine.completed_depth = 0
+    action = _engine.evaluate(OthelloPosition(position_str), float('inf'))
+    return position_str, action.row, action.col, action.value, _engine.completed_depth
+
+
+def expand(plies, width):
+    """
+    Finds the positions most often reached early in the game. The game tree is expanded ply by ply from the start
+    position, and a position is counted once for every sequence of moves leading to it. Positions that are symmetric
+    to each other are counted as one. Only the width most frequent positions of a ply are expanded further.
+    :param plies: Number of moves to expand from the start position.
+    :param width: Number of positions kept per ply.
+    :return: List of (position string, count) pairs, ply by ply and the most frequent first within a ply. Positions
+    where the player to move has to pass are left out, the book would not help there.
+    """
+    start = OthelloPosition()
+    start.initialize()
+    level = {canonical_key(start)[0]: [start, 1]}
+    positions = []
+    for ply in range(plies + 1):
+        ranked = sorted(level.values(), key=lambda entry: -entry[1])[:width]
+        level = {}
+        for position, count in ranked:
+            mask, actions = position.get_moves()
+            if mask:
+                positions.append((position.to_string(), count))
+            else:
+                actions = [OthelloAction(0, 0, True)]
+            if ply == plies:
+                continue
+            for action in actions:
+                child = position.make_move(action)
+                if not mask and not child.get_moves()[0]:
+                    continue
+                key = canonical_key(child)[0]
+                if key in level:
+                    level[key][1] += count
+                else:
+                    level[key] = [child, count]
+    return positions
+
+
+def load_checkpoint(path, depth):
+    """
+    Reads the positions scored by an earlier run.
+    :param path: The checkpoint file, one JSON object per line. A missing file is the same as an empty one.
+    :param depth: Search depth of this run, positions searched less deep are scored again.
+    :return: Dict from position string to its best move, an OthelloAction with its value.
+    """
+    scored = {}
+    if not os.path.exists(path):
+        return scored
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line is cut off if the builder was stopped while writing it
+                continue
+            if entry['depth'] >= depth:
+                action = OthelloAction(entry['row'], entry['col'])
+                action.value = entry['value']
+                scored[entry['position']] = action
+    return scored
+
+
+def __end_last_line(path):
+    """
+    Ends the last line of the checkpoint file if a stopped build cut it off, so the next score starts on a line of
+    its own.
+    """
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, 'rb+') as f:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+def build(output, plies, width, depth, workers, checkpoint, table_size=16, progress=None):
+    """
+    Builds an opening book. The positions are scored on a pool of worker processes, and every score is appended to the
+    checkpoint file as soon as it is found, so a stopped build continues where it was when it is run again.
+    :param output: The book file to write, see write_book.
+    :param plies: Number of moves from the start position to cover, see expand.
+    :param width: Number of positions per ply, see expand.
+    :param depth: Search depth of the scoring searches.
+    :param workers: Number of worker processes.
+    :param checkpoint: The checkpoint file.
+    :param table_size: Size of the transposition table of each worker in MB.
+    :param progress: A text stream progress is written to, or None.
+    :return: The number of entries in the book.
+    """
+    positions = [position_str for position_str, count in expand(plies, width)]
+    scored = load_checkpoint(checkpoint, depth)
+    remaining = [position_str for position_str in positions if position_str not in scored]
+    if progress is not None:
+        progress.write("%d positions, %d to score\n" % (len(positions), len(remaining)))
+
+    if remaining:
+        __end_last_line(checkpoint)
+        with open(checkpoint, 'a') as f, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(depth, table_size)) as pool:
+            futures = [pool.submit(_score_position, position_str) for position_str in remaining]
+            for done, future in enumerate(as_completed(futures), 1):
+                position_str, row, col, value, searched = future.result()
+                f.write(json.dumps({'position': position_str, 'row': row, 'col': col, 'value': value,
+                                    'depth': searched}) + "\n")
+                f.flush()
+                action = OthelloAction(row, col)
+                action.value = value
+                scored[position_str] = action
+                if progress is not None:
+                    progress.write("%d/%d scored\n" % (done, len(remaining)))
+
+    return write_book(output, (book_entry(OthelloPosition(position_str), scored[position_str])
+                               for position_str in positions))
+
+
+def main(argv):
+    """
+    Command line entry point, run with --help for the options.
+    :param argv: The command line arguments, without the program name.
+    """
+    parser = argparse.ArgumentParser(description="Builds an Othello opening book")
+    parser.add_argument("output", help="the book file to write")
+    parser.add_argument("--plies", type=int, default=8, help="number of moves from the start position to cover")
+    parser.add_argument("--width", type=int, default=200, help="number of positions per ply")
+    parser.add_argument("--depth", type=int, default=8, help="search depth of the scoring searches")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--checkpoint", help="file the scores are saved in, the output file with .ckpt by default")
+    parser.add_argument("--table-size", type=int, default=16, help="transposition table size per worker in MB")
+    args = parser.parse_args(argv)
+
+    checkpoint = args.checkpoint or args.output + ".ckpt"
+    count = build(args.output, args.plies, args.width, args.depth, args.workers, checkpoint, args.table_size,
+                  sys.stdout)
+    print("Wrote %d positions to %s" % (count, args.output))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,99 @@
+from OthelloEvaluator import OthelloEvaluator
+from collections import OrderedDict
+
+
+class CachedEvaluator(OthelloEvaluator):
+    """
+    Evaluator that remembers the scores of another evaluator. Iterative deepening reaches the same leaf positions at
+    every depth, so a score computed in one iteration can be reused by the next ones.
+
+    Scores are keyed by the Zobrist hash of the position, which includes the player to move. The cache holds at most
+    capacity scores, when it is full the least recently used one is dropped.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, evaluator, capacity=1 << 18):
+        """
+        :param evaluator: The evaluator whose scores are cached.
+        :param capacity: Maximum number of cached scores.
+        """
+        self.evaluator = evaluator
+        self.capacity = capacity
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """
+        Removes all cached scores and resets the counters.
+        """
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, othello_position):
+        """
+        Passed on to the cached evaluator.
+        :param othello_position: The root position.
+        """
+        self.evaluator.prepare(othello_position)
+
+    def evaluate(self, othello_position, timeout=None):
+        """
+        Evaluates a position, using the cached score if there is one.
+        :param othello_position: Position to evaluate.
+        :param timeout: Passed on to the cached evaluator.
+        :return: The score of the cached evaluator.
+        """
+        key = othello_position.hash
+        cache = self.cache
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = self.evaluator.evaluate(othello_position, timeout)
+        cache[key] = value
+        if len(cache) > self.capacity:
+            cache.popitem(last=False)
+        return value
+
+    def evaluate_batch(self, othello_positions):
+        """
+        Evaluates a list of positions, the ones not in the cache with one call to the batch evaluator.
+        :param othello_positions: Positions to evaluate.
+        :return: List of evaluations.
+        """
+        cache = self.cache
+        values = []
+        missing = []
+        for index, othello_position in enumerate(othello_positions):
+            value = cache.get(othello_position.hash)
+            if value is not None:
+                cache.move_to_end(othello_position.hash)
+                self.hits += 1
+            else:
+                missing.append(index)
+            values.append(value)
+
+        if missing:
+            self.misses += len(missing)
+            scores = self.evaluator.evaluate_batch([othello_positions[index] for index in missing])
+            for index, value in zip(missing, scores):
+                values[index] = value
+                cache[othello_positions[index].hash] = value
+            while len(cache) > self.capacity:
+                cache.popitem(last=False)
+        return values
+
+    def statistics(self):
+        """
+        Cache statistics since the last call to clear.
+        :return: A dict with the number of hits and misses, the hit rate and the number of cached scores.
+        """
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': rate, 'size': len(self.cache)}
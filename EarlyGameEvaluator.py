@@ -1,74 +1,60 @@
-from OthelloEvaluator import OthelloEvaluator
-import time
+from OthelloEvaluator import WeightedEvaluator
+import numpy as np
 
 
 
-class EarlyGameEvalutor(OthelloEvaluator):
+class EarlyGameEvalutor(WeightedEvaluator):
     """
     Class to represent a evaluator used by a Minimax algorithm. 
 
     Author: dv18mln
     """
-    
-    def evaluate(self, othello_position, timeout):
+
+    # Weight of each tile, the border is never used.
+    tile_score = [
+        [0,   0,   0,   0,   0,   0,   0,   0,   0,   0],
+        [0, 120, -50,  -5,  -5,  -5,  -5, -50, 120,   0],
+        [0, -50, -50,  -5,  -5,  -5,  -5, -50, -50,   0],
+        [0,  -5,  -5,  10,   5,   5,  10,  -5,  -5,   0],
+        [0,  -5,  -5,   5,   5,   5,   5,  -5,  -5,   0],
+        [0,  -5,  -5,   5,   5,   5,   5,  -5,  -5,   0],
+        [0,  -5,  -5,  10,   5,   5,  10,  -5,  -5,   0],
+        [0, -50, -50,  -5,  -5,  -5,  -5, -50, -50,   0],
+        [0, 120, -50,  -5,  -5,  -5,  -5, -50, 120,   0],
+        [0,   0,   0,   0,   0,   0,   0,   0,   0,   0]
+    ]
+
+    def combine(self, W, B):
         """
         Evaluation function only used in the early part of the game. 
         The functions values the inner 4x4 matrix highly, when matrix 
         is full the evaluation function is replaced. Filling the middle
         in the beginning can yield in great mobility in later parts of
         the game. 
-        :param othello_position: Position to evaluate.
-        :param timeout: Set timeout for the algortihm to exit.
+        The board is scored with a single matrix product of the
+        markers and the tile weights (see FEATURES), or from the sums
+        kept by the position (see WeightedEvaluator).
+        :param W: Sums of the white markers: positional score and
+        markers.
+        :param B: The same sums of the black markers.
+        :return: A tuple (W_score, B_score).
         """
+        W_markers = W[1]
+        B_markers = B[1]
 
-        tile_score = [
-            [0,   0,   0,   0,   0,   0,   0,   0,   0,   0],
-            [0, 120, -50,  -5,  -5,  -5,  -5, -50, 120,   0],
-            [0, -50, -50,  -5,  -5,  -5,  -5, -50, -50,   0],
-            [0,  -5,  -5,  10,   5,   5,  10,  -5,  -5,   0],
-            [0,  -5,  -5,   5,   5,   5,   5,  -5,  -5,   0],
-            [0,  -5,  -5,   5,   5,   5,   5,  -5,  -5,   0],
-            [0,  -5,  -5,  10,   5,   5,  10,  -5,  -5,   0],
-            [0, -50, -50,  -5,  -5,  -5,  -5, -50, -50,   0],
-            [0, 120, -50,  -5,  -5,  -5,  -5, -50, 120,   0],
-            [0,   0,   0,   0,   0,   0,   0,   0,   0,   0]
-        ]
-
-
-        W_score = 0
-        B_score = 0
-        E = 0
-        W_markers = 0
-        B_markers = 0
-
-
-        for i in range(1,9):
-            if time.time() >= timeout:
-                return None
-            for j in range(1,9):
-                
-                if othello_position.board[i][j] == 'W':
-                   W_score += tile_score[i][j]
-                   W_markers += 1
-                
-                elif othello_position.board[i][j] == 'B':
-                    B_score += tile_score[i][j]
-                    B_markers += 1
-
-                else:
-                    E += 1
+        crowded = (W_markers > 5) & (B_markers > 5)
+        W_score = W[0] - W_markers * crowded + 2 * W_markers * (W_markers <= 3)
+        B_score = B[0] - B_markers * crowded + 2 * B_markers * (B_markers <= 3)
+        return W_score, B_score
 
-        if W_markers > 5 and B_markers > 5:
-            W_score -= W_markers
-            B_score -= B_markers
 
-        if W_markers <= 3:
-            W_score += 2 * W_markers
-        if B_markers <= 3:
-            B_score += 2 * B_markers
+# Columns: tile weight, 1 to count markers.
+FEATURES = np.array([
+    [EarlyGameEvalutor.tile_score[i][j], 1] for i in range(1, 9) for j in range(1, 9)
+])
 
+# The tile weights as a list, the weight table tracked by incremental positions.
+WEIGHTS = FEATURES[:, 0].tolist()
 
-        if othello_position.to_move():
-            return W_score
-        else:
-            return -B_score
+EarlyGameEvalutor.FEATURES = FEATURES
+EarlyGameEvalutor.WEIGHTS = WEIGHTS
@@ -0,0 +1,246 @@
+from MoveHandler import legalMoves, flipMask, countBits, FULL
+from OthelloAction import OthelloAction
+from SearchController import SearchController, SearchTimeout
+
+# The four 4x4 quadrants of the board, used for parity ordering.
+QUADRANTS = [0x000000000F0F0F0F, 0x00000000F0F0F0F0, 0x0F0F0F0F00000000, 0xF0F0F0F000000000]
+QUADRANT_OF = [(square // 32) * 2 + (square % 8) // 4 for square in range(64)]
+
+# Above this many empties, moves are ordered by the opponent's mobility (fastest-first), below it by parity only.
+FASTEST_FIRST_EMPTIES = 7
+
+
+class EndgameTimeout(SearchTimeout):
+    """
+    Raised when the solver runs out of time. The deadline is watched by a SearchController, every node of the search
+    ticks it.
+    """
+    pass
+
+
+class EndgameSolver(object):
+    """
+    Solves the last part of the game exactly. The game is played out to the end with a negamax alpha beta search, and
+    the result is the final disc differential (empty squares go to the winner) with perfect play from both sides.
+
+    The search works directly on the bitboards and uses its own move ordering:
+    - fastest-first: with many empties, moves leaving the opponent few replies are searched first.
+    - parity: moves into a quadrant with an odd number of empties are searched first, since the last move in a region
+      is usually an advantage.
+    - with 4 or fewer empties, the empty squares are tried one by one from a list, without generating move masks, and
+      the last empty square is solved with a single flip computation.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, max_empties=12):
+        """
+        :param max_empties: The solver is used when at most this many squares are empty.
+        """
+        self.max_empties = max_empties
+        self.nodes = 0
+        self.controller = None
+
+    def should_solve(self, othello_position):
+        """
+        Check if the position is close enough to the end to be solved
+        :param othello_position: The position
+        :return: True if the number of empty squares is at most max_empties
+        """
+        return 64 - countBits(othello_position.white | othello_position.black) <= self.max_empties
+
+    def solve(self, othello_position, timeout):
+        """
+        Finds the best move and the exact final disc differential of a position.
+        :param othello_position: The position to solve.
+        :param timeout: Time at which to give up.
+        :return: The best move as an OthelloAction (a pass move if there is no legal move). Its value is the final disc
+        differential from white's point of view.
+        :raises EndgameTimeout: If the timeout is reached before the position is solved.
+        """
+        self.controller = SearchController(timeout)
+        try:
+            return self.__solve_root(othello_position)
+        except SearchTimeout:
+            raise EndgameTimeout()
+        finally:
+            self.nodes = self.controller.node_count()
+
+    def __solve_root(self, othello_position):
+        """
+        Searches the moves of the root position, see solve.
+        """
+        if othello_position.to_move():
+            own, opp, sign = othello_position.white, othello_position.black, 1
+        else:
+            own, opp, sign = othello_position.black, othello_position.white, -1
+
+        moves = legalMoves(own, opp)
+        if not moves:
+            action = OthelloAction(0, 0, True)
+            action.value = sign * -self.__search(opp, own, -64, 64, True)
+            return action
+
+        action = None
+        alpha = -65
+        for square in self.__order(own, opp, moves):
+            flipped = flipMask(square, own, opp)
+            value = -self.__search(opp & ~flipped, own | flipped | (1 << square), -64, -alpha, False)
+            if value > alpha:
+                alpha = value
+                action = OthelloAction(square // 8 + 1, square % 8 + 1)
+
+        action.value = sign * alpha
+        return action
+
+    def __search(self, own, opp, alpha, beta, passed):
+        """
+        Negamax alpha beta search to the end of the game.
+        :param own: Bitboard of the player to move.
+        :param opp: Bitboard of the opponent.
+        :param alpha: Lower bound.
+        :param beta: Upper bound.
+        :param passed: True if the previous move was a pass.
+        :return: Final disc differential for the player to move.
+        """
+        empty = ~(own | opp) & FULL
+        empties = countBits(empty)
+        if empties <= 4:
+            return self.__search_small(own, opp, alpha, beta, self.__empty_list(empty), passed)
+        self.controller.tick()
+
+        moves = legalMoves(own, opp)
+        if not moves:
+            if passed:
+                return self.__final(own, opp)
+            return -self.__search(opp, own, -beta, -alpha, True)
+
+        best = -65
+        for square in self.__order(own, opp, moves):
+            flipped = flipMask(square, own, opp)
+            value = -self.__search(opp & ~flipped, own | flipped | (1 << square), -beta, -alpha, False)
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        return best
+
+    def __search_small(self, own, opp, alpha, beta, empties, passed):
+        """
+        Search for the last 4 or fewer empty squares. The empty squares are tried in order from a list, which is
+        cheaper than generating a move mask when so few are left.
+        :param own: Bitboard of the player to move.
+        :param opp: Bitboard of the opponent.
+        :param alpha: Lower bound.
+        :param beta: Upper bound.
+        :param empties: The empty squares, ordered by parity.
+        :param passed: True if the previous move was a pass.
+        :return: Final disc differential for the player to move.
+        """
+        if len(empties) == 1:
+            return self.__solve_last(own, opp, empties[0])
+        self.controller.tick()
+        if not empties:
+            return self.__final(own, opp)
+
+        best = -65
+        for i in range(len(empties)):
+            square = empties[i]
+            flipped = flipMask(square, own, opp)
+            if not flipped:
+                continue
+            rest = empties[:i] + empties[i + 1:]
+            value = -self.__search_small(opp & ~flipped, own | flipped | (1 << square), -beta, -alpha, rest, False)
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        return best
+
+        if best == -65:
+            if passed:
+                return self.__final(own, opp)
+            return -self.__search_small(opp, own, -beta, -alpha, empties, True)
+        return best
+
+    def __solve_last(self, own, opp, square):
+        """
+        Score of the game when only one square is empty.
+        :param own: Bitboard of the player to move.
+        :param opp: Bitboard of the opponent.
+        :param square: The empty square.
+        :return: Final disc differential for the player to move.
+        """
+        self.controller.tick()
+        # 63 discs on the board
+        diff = 2 * countBits(own) - 63
+        flipped = flipMask(square, own, opp)
+        if flipped:
+            return diff + 2 * countBits(flipped) + 1
+        flipped = flipMask(square, opp, own)
+        if flipped:
+            return diff - 2 * countBits(flipped) - 1
+        # Nobody can move, the empty square goes to the winner
+        return diff + 1 if diff > 0 else diff - 1
+
+    def __final(self, own, opp):
+        """
+        Score of a finished game, the empty squares are counted for the winner.
+        :param own: Bitboard of the player to move.
+        :param opp: Bitboard of the opponent.
+        :return: Final disc differential for the player to move.
+        """
+        own_count = countBits(own)
+        opp_count = countBits(opp)
+        empties = 64 - own_count - opp_count
+        if own_count > opp_count:
+            return own_count - opp_count + empties
+        if own_count < opp_count:
+            return own_count - opp_count - empties
+        return 0
+
+    def __order(self, own, opp, moves):
+        """
+        Orders the moves of a node, fastest-first when many squares are empty and by parity after that.
+        :param own: Bitboard of the player to move.
+        :param opp: Bitboard of the opponent.
+        :param moves: Bitboard of legal moves.
+        :return: List of squares.
+        """
+        empty = ~(own | opp) & FULL
+        odd = [countBits(empty & quadrant) & 1 for quadrant in QUADRANTS]
+        fastest_first = countBits(empty) > FASTEST_FIRST_EMPTIES
+
+        scored = []
+        while moves:
+            bit = moves & -moves
+            square = bit.bit_length() - 1
+            moves ^= bit
+            score = odd[QUADRANT_OF[square]]
+            if fastest_first:
+                flipped = flipMask(square, own, opp)
+                mobility = countBits(legalMoves(opp & ~flipped, own | flipped | bit))
+                score -= 2 * mobility
+            scored.append((score, square))
+        scored.sort(reverse=True)
+        return [square for score, square in scored]
+
+    def __empty_list(self, empty):
+        """
+        Lists the empty squares, those in quadrants with an odd number of empties first.
+        :param empty: Bitboard of empty squares.
+        :return: List of squares.
+        """
+        odd = []
+        even = []
+        for quadrant in QUADRANTS:
+            region = empty & quadrant
+            target = odd if countBits(region) & 1 else even
+            while region:
+                bit = region & -region
+                target.append(bit.bit_length() - 1)
+                region ^= bit
+        return odd + even
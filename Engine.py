@@ -0,0 +1,184 @@
+from Othello import game
+from OpeningBook import OpeningBook
+from OthelloPosition import OthelloPosition
+from SearchStatistics import SearchStatistics
+import sys
+import time
+
+
+class SearchResult(object):
+    """
+    The result of Engine.search.
+    """
+
+    def __init__(self, action, depth, elapsed):
+        """
+        :param action: The best move as an OthelloAction, its value is the score from white's point of view.
+        :param depth: The deepest completed iteration, 0 if the move came from the endgame solver or a fallback.
+        :param elapsed: Time used in seconds.
+        """
+        self.action = action
+        self.value = action.value
+        self.depth = depth
+        self.elapsed = elapsed
+
+
+def parse_position(position_str):
+    """
+    Creates a position from a position string.
+    :param position_str: 65 characters, the player to move (W or B) followed by the squares (E, O or X), or a string
+    of at most one character for the start position.
+    :return: The OthelloPosition.
+    :raises ValueError: If the string has any other length.
+    """
+    if len(position_str) <= 1:
+        position = OthelloPosition()
+        position.initialize()
+        return position
+    if len(position_str) != 65:
+        raise ValueError("Position string invalid.")
+    return OthelloPosition(position_str)
+
+
+class Engine(object):
+    """
+    The search engine as a reusable object. One engine keeps its transposition table, move ordering history and
+    evaluation caches (see eval_cache) between moves, so a program playing a whole game should create it once and call
+    search for every move.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, table_size=16, workers=0, lazy_smp=False, statistics=None, book=None, eval_cache=0):
+        """
+        :param table_size: Size of the transposition table in MB.
+        :param workers: Number of worker processes, 0 searches in this process only.
+        :param lazy_smp: With workers, use Lazy SMP instead of splitting the root moves.
+        :param statistics: A SearchStatistics to record every search in, or None.
+        :param book: Path of an opening book file, or None to always search.
+        :param eval_cache: Number of evaluator scores to cache per game phase, 0 for no caches. With workers every
+        worker has caches of its own, see game.set_evaluation_cache.
+        :raises ValueError: If book is not an opening book.
+        """
+        self.game = game(search_depth=1, table_size=table_size)
+        self.game.set_evaluation_cache(eval_cache)
+        self.game.set_statistics(statistics)
+        self.book = OpeningBook(book) if book is not None else None
+        self.game.set_opening_book(self.book)
+        if workers > 0 and lazy_smp:
+            self.game.set_lazy_smp(workers, table_size)
+        elif workers > 0:
+            self.game.set_parallel(workers, table_size)
+
+    def search(self, position, time_limit):
+        """
+        Finds the best move in a position.
+        :param position: An OthelloPosition or a position string, see parse_position.
+        :param time_limit: Time to search in seconds.
+        :return: A SearchResult.
+        """
+        if isinstance(position, str):
+            position = parse_position(position)
+        started = time.time()
+        self.game.completed_depth = 0
+        self.game.set_search_depth(1)
+        action = self.game.evaluate(position, started + time_limit)
+        return SearchResult(action, self.game.completed_depth, time.time() - started)
+
+    def close(self):
+        """
+        Stops the worker processes, if any, and closes the opening book.
+        """
+        self.game.set_parallel(0)
+        self.game.set_lazy_smp(0)
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        self.game.set_opening_book(None)
+
+
+def format_action(action):
+    """
+    :param action: An OthelloAction.
+    :return: The move on the format (3,6) or pass, as printed by OthelloAction.print_move.
+    """
+    if action.is_pass_move:
+        return "pass"
+    return "(" + str(action.row) + "," + str(action.col) + ")"
+
+
+def serve(engine, input_stream, output_stream):
+    """
+    Answers search requests, one per line, until the input ends or a line says quit. A request is a position string
+    and a time limit in seconds separated by a space, the answer is the move on its own line. An invalid request is
+    answered with a line starting with error.
+    :param engine: The Engine to search with.
+    :param input_stream: Where the requests are read.
+    :param output_stream: Where the answers are written.
+    """
+    for line in input_stream:
+        words = line.split()
+        if not words:
+            continue
+        if words[0] == "quit":
+            break
+        try:
+            if len(words) != 2:
+                raise ValueError("Expected a position string and a time limit.")
+            result = engine.search(words[0], float(words[1]))
+            output_stream.write(format_action(result.action) + "\n")
+        except ValueError as error:
+            output_stream.write("error " + str(error) + "\n")
+        output_stream.flush()
+
+
+def main(argv):
+    """
+    Command line entry point. With a position string and a time limit in seconds the best move is printed, with
+    --server the engine answers requests from stdin (see serve). With --stats a JSON record of every search is
+    written to stderr, see SearchStatistics. With --book followed by a file the moves of the opening book in it are
+    played without searching, see OpeningBook.
+    :param argv: The command line arguments, argv[0] is the program name.
+    """
+    statistics = None
+    if "--stats" in argv:
+        argv = [arg for arg in argv if arg != "--stats"]
+        statistics = SearchStatistics(sys.stderr)
+
+    book = None
+    if "--book" in argv:
+        index = argv.index("--book")
+        if index + 1 >= len(argv):
+            print("--book needs a file")
+            return
+        book = argv[index + 1]
+        argv = argv[:index] + argv[index + 2:]
+
+    if len(argv) >= 2 and argv[1] == "--server":
+        engine = Engine(statistics=statistics, book=book)
+        try:
+            serve(engine, sys.stdin, sys.stdout)
+        finally:
+            engine.close()
+        return
+
+    if len(argv) < 3:
+        print("Too few arguments")
+        return
+
+    try:
+        position = parse_position(argv[1])
+    except ValueError as error:
+        print(error)
+        return
+
+    engine = Engine(statistics=statistics, book=book)
+    try:
+        result = engine.search(position, int(argv[2]))
+    finally:
+        engine.close()
+    result.action.print_move()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
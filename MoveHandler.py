@@ -1,256 +1,131 @@
-boardsize = 10
+# Bitboard constants, bit (row - 1) * 8 + (col - 1) is the square (row, col).
+FULL = 0xFFFFFFFFFFFFFFFF
+NOT_COL_1 = 0xFEFEFEFEFEFEFEFE
+NOT_COL_8 = 0x7F7F7F7F7F7F7F7F
+CENTER = 0x00003C3C3C3C0000  # the inner 4x4 squares
 
+# Shift amount and wrap mask for the eight directions. A positive shift moves
+# towards higher rows/columns, the mask removes squares that wrapped around
+# to the other side of the board.
+DIRECTIONS = [
+    (-8, FULL),        # north
+    (8, FULL),         # south
+    (-1, NOT_COL_8),   # west
+    (1, NOT_COL_1),    # east
+    (-9, NOT_COL_8),   # north west
+    (-7, NOT_COL_1),   # north east
+    (7, NOT_COL_8),    # south west
+    (9, NOT_COL_1),    # south east
+]
 
-def moveNorth(board, lookFor, row, col):
-    """
-    Check for markers in the north direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
 
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
+def shift(bits, amount):
     """
-    if row < 1 or board[row-1][col] != lookFor:
-        return [-1, -1]
-
-    coords = []
-
-    i = row - 1
-
-    while board[i][col] == lookFor:
-        coords.append([i, col])
-        i -= 1
-
-    if board[i][col] != lookFor and board[i][col] != 'E':
-        return coords
-    else:
-        return [-1, -1]
-
+    Shift a bitboard, keeping it within 64 bits.
 
-def moveEast(board, lookFor, row, col):
+    :param bits: the bitboard
+    :param amount: number of bits to shift, negative shifts right
+    :return: the shifted bitboard
     """
-    Check for markers in the east direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
-
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
-    """
-    if col >= boardsize or board[row][col+1] != lookFor:
-        return [-1, -1]
-
-    coords = []
-
-    i = col + 1
-
-    while board[row][i] == lookFor:
-        coords.append([row, i])
-        i += 1
+    if amount > 0:
+        return (bits << amount) & FULL
+    return bits >> -amount
 
-    if board[row][i] != lookFor and board[row][i] != 'E':
-        return coords
-    else:
-        return [-1, -1]
 
-
-def moveSouth(board, lookFor, row, col):
+def countBits(bits):
     """
-    Check for markers in the south direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
+    Count the markers in a bitboard.
 
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
+    :param bits: the bitboard
+    :return: number of set bits
     """
-    if row >= boardsize or board[row+1][col] != lookFor:
-        #print("South: not what we are looking for!")
-        return [-1, -1]
-
-    coords = []
-
-    i = row + 1
-
-    while board[i][col] == lookFor:
-        coords.append([i, col])
-        i += 1
-
-    if board[i][col] != lookFor and board[i][col] != 'E':
-        return coords
-    else:
-        return [-1, -1]
-
+    return bin(bits).count("1")
 
 
-
-
-def moveWest(board, lookFor, row, col):
+def legalMoves(own, opp):
     """
-    Check for markers in the west direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
+    Find every legal square for the player with the markers own.
+    For each direction the own markers are flood filled over
+    adjacent opponent markers with a Kogge-Stone occluded fill
+    (steps of 1, 2 and 4), a move is an empty square one step
+    past the filled opponent markers.
 
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
+    :param own: bitboard of the player to move
+    :param opp: bitboard of the opponent
+    :return: bitboard with one bit set per legal move
     """
-    if col < 1 or board[row][col-1] != lookFor:
-        return [-1, -1]
-
-    coords = []
+    empty = ~(own | opp) & FULL
+    moves = 0
 
-    i = col - 1
+    for amount, mask in DIRECTIONS:
+        pro = opp & mask
+        gen = own
+        gen |= pro & shift(gen, amount)
+        pro &= shift(pro, amount)
+        gen |= pro & shift(gen, 2 * amount)
+        pro &= shift(pro, 2 * amount)
+        gen |= pro & shift(gen, 4 * amount)
+        moves |= shift(gen & opp, amount) & mask & empty
 
-    while board[row][i] == lookFor:
-        coords.append([row, i])
-        i -= 1
+    return moves
 
-    if board[row][i] != lookFor and board[row][i] != 'E':
-        return coords
-    else:
-        return [-1, -1]
 
-
-def moveNorthwest(board, lookFor, row, col):
+def __ray(square, amount, mask):
     """
-    Check for markers in the north west direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
+    Build the bitboard of all squares from a square to the
+    edge of the board in one direction, the square itself
+    not included.
 
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
+    :param square: the starting square
+    :param amount: shift amount of the direction
+    :param mask: wrap mask of the direction
+    :return: the ray as a bitboard
     """
+    ray = 0
+    bit = shift(1 << square, amount) & mask
 
-    if (row < 1 or col < 1) or board[row-1][col-1] != lookFor:
-        return [-1, -1]
-
-    coords = []
+    while bit:
+        ray |= bit
+        bit = shift(bit, amount) & mask
 
-    i = row - 1
-    j = col - 1
+    return ray
 
-    while board[i][j] == lookFor:
-        coords.append([i, j])
-        i -= 1
-        j -= 1
 
-    if board[i][j] != lookFor and board[i][j] != 'E':
-        return coords
-    else:
-        return [-1, -1]
+# For each square, the non-empty rays leaving it together with
+# a flag telling if the ray runs towards higher bits.
+RAYS = [
+    [(__ray(square, amount, mask), amount > 0)
+     for amount, mask in DIRECTIONS if __ray(square, amount, mask)]
+    for square in range(64)
+]
 
 
-def moveNortheast(board, lookFor, row, col):
+def flipMask(square, own, opp):
     """
-    Check for markers in the north east direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
+    Find the markers flipped by placing a marker on square.
+    In each direction the first square on the ray that is not
+    an opponent marker is found. If it is one of our own, the
+    opponent markers in between are flipped.
 
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
+    :param square: the square the marker is placed on
+    :param own: bitboard of the player to move
+    :param opp: bitboard of the opponent
+    :return: bitboard of the flipped markers
     """
-    if (row < 1 or col >= boardsize) or board[row-1][col+1] != lookFor:
-        return [-1, -1]
-
-    coords = []
-
-    i = row - 1
-    j = col + 1
-
-    while board[i][j] == lookFor:
-        coords.append([i, j])
-        i -= 1
-        j += 1
-
-    if board[i][j] != lookFor and board[i][j] != 'E':
-        return coords
-    else:
-        return [-1, -1]
-
-
-def moveSouthwest(board, lookFor, row, col):
-    """
-    Check for markers in the south west direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
-
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
-    """
-
-    if (row >= boardsize or col < 1) or board[row+1][col-1] != lookFor:
-        return [-1, -1]
-
-    coords = []
-
-    i = row + 1
-    j = col - 1
-
-    while board[i][j] == lookFor:
-        coords.append([i, j])
-        i += 1
-        j -= 1
-
-    if board[i][j] != lookFor and board[i][j] != 'E':
-        return coords
-    else:
-        return [-1, -1]
-
-
-def moveSoutheast(board, lookFor, row, col):
-    """
-    Check for markers in the south east direction to 
-    flip.
-    If no marker was found the that direction,
-    or if the opponents markers should not be flipped,
-    return array of negative values.
-
-    :param lookFor: The color to look for.
-    :param row: the starting row
-    :param col: the starting col
-    :return: list of the found coordinates
-    """
-
-    if (row >= boardsize or col >= boardsize) or board[row+1][col+1] != lookFor:
-        return [-1, -1]
-
-    coords = []
+    flipped = 0
 
-    i = row + 1
-    j = col + 1
+    for ray, increasing in RAYS[square]:
+        blockers = ray & ~opp
+        if not blockers:
+            continue
 
-    while board[i][j] == lookFor:
-        coords.append([i, j])
-        i += 1
-        j += 1
+        if increasing:
+            first = blockers & -blockers
+            if first & own:
+                flipped |= ray & (first - 1)
+        else:
+            first = 1 << (blockers.bit_length() - 1)
+            if first & own:
+                flipped |= ray & ~((first << 1) - 1)
 
-    if board[i][j] != lookFor and board[i][j] != 'E':
-        return coords
-    else:
-        return [-1, -1]
+    return flipped
@@ -0,0 +1,126 @@
+from SuperSmartEvaluator import SuperSmartEvaluator
+from TranspositionTable import NO_MOVE
+import random
+
+KILLERS_PER_PLY = 2
+MAX_PLY = 64
+
+HASH_MOVE_SCORE = 1 << 50
+KILLER_SCORE = 1 << 40
+HISTORY_LIMIT = 1 << 30
+
+# Upper limit of the random noise added to the history scores of a seeded orderer. A cutoff at depth 2 scores 4, so the
+# noise only decides between moves without a real history.
+HISTORY_NOISE = 4
+
+# Static priority of each square, from the tile weights of SuperSmartEvaluator. Shifted to 0-255 so it only breaks
+# ties between moves with the same history score.
+STATIC_SCORE = [SuperSmartEvaluator.tile_score[square // 8 + 1][square % 8 + 1] + 128 for square in range(64)]
+
+
+class MoveOrderer(object):
+    """
+    Orders the moves of a node for alpha beta search, so the moves most likely to cause a cutoff are searched first.
+    The order is:
+
+    1. The hash move, the best move found for the position by an earlier iteration.
+    2. Killer moves, moves that caused a cutoff at the same ply in another part of the tree.
+    3. The rest, by history score (how often and how deep the move has caused cutoffs) and then by static square
+       priority.
+
+    Moves are square indexes, (row - 1) * 8 + (col - 1).
+
+    A seeded orderer adds a little random noise to the history scores at every new search, so several searches of the
+    same position (the workers of LazySMPSearch) do not all search the moves in the same order.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, seed=None):
+        """
+        :param seed: Seed of the history noise, or None for no noise.
+        """
+        self.seed = seed
+        self.random = random.Random(seed) if seed is not None else None
+        self.killers = [[NO_MOVE] * KILLERS_PER_PLY for ply in range(MAX_PLY)]
+        # One history table for each player, indexed by maxPlayer
+        self.history = [[0] * 64, [0] * 64]
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        """
+        Prepares for a new search. Killers are cleared, history scores are halved so old results fade out (and noise
+        is added if the orderer is seeded) and the statistics are reset.
+        """
+        for killers in self.killers:
+            for i in range(KILLERS_PER_PLY):
+                killers[i] = NO_MOVE
+        for history in self.history:
+            for square in range(64):
+                history[square] >>= 1
+                if self.random is not None:
+                    history[square] += self.random.randrange(HISTORY_NOISE)
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def order(self, othello_position, mask, ply, hash_move=NO_MOVE):
+        """
+        Orders the legal moves of a position.
+        :param othello_position: The position.
+        :param mask: Bitboard of the legal moves, as returned by get_moves.
+        :param ply: Distance from the root.
+        :param hash_move: The best move stored for the position, or NO_MOVE.
+        :return: List of squares, the most promising first.
+        """
+        killers = self.killers[ply] if ply < MAX_PLY else ()
+        history = self.history[othello_position.maxPlayer]
+        scored = []
+        while mask:
+            bit = mask & -mask
+            square = bit.bit_length() - 1
+            mask ^= bit
+            if square == hash_move:
+                score = HASH_MOVE_SCORE
+            elif square in killers:
+                score = KILLER_SCORE - killers.index(square)
+            else:
+                score = (history[square] << 8) + STATIC_SCORE[square]
+            scored.append((score, square))
+        scored.sort(reverse=True)
+        return [square for score, square in scored]
+
+    def cutoff(self, othello_position, square, ply, depth, index):
+        """
+        Records a move that caused a cutoff.
+        :param othello_position: The position the move was made in.
+        :param square: The move.
+        :param ply: Distance from the root.
+        :param depth: Remaining search depth at the node.
+        :param index: Position of the move in the searched order, 0 for the first move.
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != square:
+                killers[1:] = killers[:-1]
+                killers[0] = square
+
+        history = self.history[othello_position.maxPlayer]
+        history[square] += depth * depth
+        if history[square] > HISTORY_LIMIT:
+            for i in range(64):
+                history[i] >>= 1
+
+    def statistics(self):
+        """
+        Cutoff statistics since the last call to new_search.
+        :return: A dict with the number of cutoffs, how many of them were caused by the first move searched, and the
+        rate of first move cutoffs.
+        """
+        rate = self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+        return {'cutoffs': self.cutoffs, 'first_move_cutoffs': self.first_move_cutoffs,
+                'first_move_cutoff_rate': rate}
@@ -0,0 +1,226 @@
+from OthelloPosition import zobrist_hash
+from OthelloAction import OthelloAction
+import mmap
+import struct
+
+# The file starts with this, followed by the entries sorted by key.
+MAGIC = b"OTHBOOK1"
+
+# An entry: the canonical key (see canonical_key), the best move in the canonical orientation (a square 0-63, or
+# PASS_SQUARE) and its score, 16 bytes in all.
+ENTRY = struct.Struct("<QBxxxf")
+KEY = struct.Struct("<Q")
+
+PASS_SQUARE = 64
+
+
+def mirror(bits):
+    """
+    Mirrors a bitboard left to right, column c becomes column 9 - c.
+    """
+    bits = ((bits >> 1) & 0x5555555555555555) | ((bits & 0x5555555555555555) << 1)
+    bits = ((bits >> 2) & 0x3333333333333333) | ((bits & 0x3333333333333333) << 2)
+    return ((bits >> 4) & 0x0F0F0F0F0F0F0F0F) | ((bits & 0x0F0F0F0F0F0F0F0F) << 4)
+
+
+def flip(bits):
+    """
+    Flips a bitboard upside down, row r becomes row 9 - r.
+    """
+    return int.from_bytes(bits.to_bytes(8, 'little'), 'big')
+
+
+def transpose(bits):
+    """
+    Flips a bitboard along the diagonal from (1,1) to (8,8), the square (r, c) becomes (c, r).
+    """
+    t = 0x0F0F0F0F00000000 & (bits ^ (bits << 28))
+    bits ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (bits ^ (bits << 14))
+    bits ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (bits ^ (bits << 7))
+    return bits ^ t ^ (t >> 7)
+
+
+def transform(bits, symmetry):
+    """
+    Applies one of the 8 symmetries of the board to a bitboard.
+    :param bits: The bitboard.
+    :param symmetry: 0-7, bit 0 mirrors, bit 1 flips and bit 2 transposes, in that order. 0 is the identity.
+    :return: The transformed bitboard.
+    """
+    if symmetry & 1:
+        bits = mirror(bits)
+    if symmetry & 2:
+        bits = flip(bits)
+    if symmetry & 4:
+        bits = transpose(bits)
+    return bits
+
+
+# SYMMETRY_SQUARES[s][square] is the square that square is moved to by symmetry s, INVERSE_SQUARES takes it back.
+SYMMETRY_SQUARES = [[transform(1 << square, symmetry).bit_length() - 1 for square in range(64)]
+                    for symmetry in range(8)]
+INVERSE_SQUARES = [[0] * 64 for symmetry in range(8)]
+for __symmetry in range(8):
+    for __square in range(64):
+        INVERSE_SQUARES[__symmetry][SYMMETRY_SQUARES[__symmetry][__square]] = __square
+
+
+def canonical_key(othello_position):
+    """
+    The key of a position in the book. The 8 symmetric versions of a position (rotations and reflections) have the
+    same key: the smallest of their Zobrist hashes.
+    :param othello_position: The position.
+    :return: A tuple (key, symmetry), where symmetry is the one giving the smallest hash.
+    """
+    white = othello_position.white
+    black = othello_position.black
+    max_player = othello_position.maxPlayer
+    return min((zobrist_hash(transform(white, symmetry), transform(black, symmetry), max_player), symmetry)
+               for symmetry in range(8))
+
+
+def book_entry(othello_position, action):
+    """
+    Turns a move into a book entry.
+    :param othello_position: The position the move is made in.
+    :param action: The best move, an OthelloAction with its value.
+    :return: A tuple (key, square, score) for write_book, the square in the canonical orientation.
+    """
+    key, symmetry = canonical_key(othello_position)
+    if action.is_pass_move:
+        square = PASS_SQUARE
+    else:
+        square = SYMMETRY_SQUARES[symmetry][(action.row - 1) * 8 + action.col - 1]
+    return key, square, action.value
+
+
+def write_book(path, entries):
+    """
+    Writes a book file.
+    :param path: The file to write.
+    :param entries: Tuples (key, square, score) as made by book_entry. Of several entries with the same key the last
+    one is kept.
+    :return: The number of entries written.
+    """
+    unique = {}
+    for key, square, score in entries:
+        unique[key] = (square, score)
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        for key in sorted(unique):
+            square, score = unique[key]
+            f.write(ENTRY.pack(key, square, score))
+    return len(unique)
+
+
+class OpeningBook(object):
+    """
+    A book of the best moves in positions early in the game, read from a file written by write_book (BookBuilder
+    makes one). The file is an array of fixed size entries sorted by key after a short header, so it is memory mapped
+    and searched with binary search instead of being read into memory.
+
+    The positions are normalized over the 8 symmetries of the board, so one entry covers all the rotated and
+    reflected versions of a position. Every entry is checked to be a legal move in the position it is found for, which
+    also rejects the rare position whose key collides with a book position.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, path):
+        """
+        Opens a book file.
+        :param path: The file.
+        :raises ValueError: If the file is not a book.
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+        size = len(MAGIC)
+        try:
+            if self.file.read(size) != MAGIC or (self.__file_size() - size) % ENTRY.size:
+                raise ValueError(path + " is not an opening book.")
+            self.count = (self.__file_size() - size) // ENTRY.size
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+        except ValueError:
+            self.file.close()
+            raise
+        self.hits = 0
+        self.misses = 0
+
+    def __file_size(self):
+        """
+        :return: Size of the book file in bytes.
+        """
+        self.file.seek(0, 2)
+        return self.file.tell()
+
+    def __len__(self):
+        return self.count
+
+    def __key(self, index):
+        """
+        :return: The key of entry index.
+        """
+        return KEY.unpack_from(self.map, len(MAGIC) + index * ENTRY.size)[0]
+
+    def find(self, key):
+        """
+        Looks up a key with binary search.
+        :param key: A key made by canonical_key.
+        :return: A tuple (square, score) in the canonical orientation, or None if the key is not in the book.
+        """
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count or self.__key(low) != key:
+            return None
+        return ENTRY.unpack_from(self.map, len(MAGIC) + low * ENTRY.size)[1:]
+
+    def lookup(self, othello_position):
+        """
+        Finds the book move of a position.
+        :param othello_position: The position.
+        :return: The move as an OthelloAction with the book score as value, or None if the position is not in the
+        book.
+        """
+        key, symmetry = canonical_key(othello_position)
+        found = self.find(key)
+        if found is not None:
+            square, score = found
+            mask = othello_position.get_moves()[0]
+            action = None
+            if square == PASS_SQUARE and not mask:
+                action = OthelloAction(0, 0, True)
+            elif square < 64:
+                square = INVERSE_SQUARES[symmetry][square]
+                if mask >> square & 1:
+                    action = OthelloAction(square // 8 + 1, square % 8 + 1)
+            if action is not None:
+                action.value = score
+                self.hits += 1
+                return action
+        self.misses += 1
+        return None
+
+    def entries(self):
+        """
+        Reads all the entries, e.g. to extend the book.
+        :return: A generator of tuples (key, square, score), as taken by write_book.
+        """
+        for index in range(self.count):
+            yield ENTRY.unpack_from(self.map, len(MAGIC) + index * ENTRY.size)
+
+    def close(self):
+        """
+        Closes the book file.
+        """
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
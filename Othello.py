@@ -1,43 +1,107 @@
 from OthelloAlgorithm import OthelloAlgorithm
 from SuperSmartEvaluator import SuperSmartEvaluator
 from EarlyGameEvaluator import EarlyGameEvalutor
-from OthelloPosition import OthelloPosition
 from OthelloAction import OthelloAction
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER, NO_MOVE
+from MoveOrdering import MoveOrderer
+from EndgameSolver import EndgameSolver, EndgameTimeout
+from MoveHandler import countBits, CENTER
+from CachedEvaluator import CachedEvaluator
+from ParallelSearch import ParallelRootSearch, LazySMPSearch
+from SearchController import SearchController, SearchTimeout
+from TimeManagement import TimeManager
 import sys
 import time
 
+# Search modes, see game.set_search_mode
+MINIMAX = "minimax"
+PVS = "pvs"
 
-def print_action():
-    """
-    Prints the best found move within the given time period.
-    """
-    global move
-    move.print_move()
-    exit()
-    
 
 class game(OthelloAlgorithm):
 
     """
     Class implementing a Minimax search algorithm, with alpha beta pruning, to 
     determine the best action to make in the board game othello.
+    A principal variation search (NegaScout) can be selected instead.
 
     Author: dv18mln
     """
 
-    def __init__(self, evaluator = SuperSmartEvaluator(), search_depth = 4):
+    def __init__(self, evaluator = SuperSmartEvaluator(), search_depth = 4, table_size = 16):
         """
         Inits the class with a search depth of 4, and a new evaluator class. 
         The search depth will be updated using iterative deepening search. 
+        Results are kept in a transposition table of table_size MB, so
+        each iteration can reuse the previous ones. 0 disables the table.
+        The evaluators for the two phases of the game keep their tile
+        weight sums in the searched position, see set_phase_evaluators.
         """
         self.set_evaluator(evaluator)
+        self.set_phase_evaluators(EarlyGameEvalutor(incremental=True), SuperSmartEvaluator(incremental=True))
         self.set_search_depth(search_depth)
+        self.table = TranspositionTable(table_size) if table_size > 0 else None
+        self.set_move_orderer(MoveOrderer())
+        self.set_search_mode(MINIMAX)
+        self.set_aspiration(25, 4)
+        self.set_endgame_solver(EndgameSolver())
+        self.set_opening_book(None)
+        self.set_batch_evaluation(False)
+        self.set_time_manager(TimeManager())
+        self.set_statistics(None)
+        self.set_max_depth(None)
+        self.parallel = None
+        self.smp = None
+        self.phase = None
 
     def set_evaluator(self, othello_evaluator):
         """
         Sets the evaluator to use in the algorithm.
         """
         self.evaluator = othello_evaluator.evaluate
+        self.batch_evaluator = othello_evaluator.evaluate_batch
+        self.prepare_evaluator = othello_evaluator.prepare
+
+    def set_phase_evaluators(self, early, late):
+        """
+        Sets the evaluators evaluate switches between: early is used
+        while the center 4x4 squares have at least 4 empty squares,
+        late after that.
+        """
+        self.early_evaluator = early
+        self.late_evaluator = late
+
+    def set_phase(self, early):
+        """
+        Sets the phase of the game the next search is in. The scores
+        of the early and late evaluators are on different scales, so
+        the transposition table (and the shared table of Lazy SMP) is
+        cleared when the phase changes.
+        :param early: True if the early evaluator is used, see
+        set_phase_evaluators.
+        """
+        if self.phase is not None and early != self.phase:
+            if self.table is not None:
+                self.table.clear()
+            if self.smp is not None:
+                self.smp.table.clear()
+        self.phase = early
+
+    def set_evaluation_cache(self, capacity):
+        """
+        Caches the scores of the phase evaluators, so leaves reached
+        again in later iterations or searches are not evaluated again.
+        :param capacity: Number of scores kept per evaluator, 0 removes
+        the caches.
+        """
+        early, late = self.early_evaluator, self.late_evaluator
+        if isinstance(early, CachedEvaluator):
+            early = early.evaluator
+        if isinstance(late, CachedEvaluator):
+            late = late.evaluator
+        if capacity > 0:
+            early, late = CachedEvaluator(early, capacity), CachedEvaluator(late, capacity)
+        self.set_phase_evaluators(early, late)
 
     
     def set_search_depth(self, depth):
@@ -49,52 +113,330 @@ class game(OthelloAlgorithm):
 
         self.search_depth = depth
 
+    def set_move_orderer(self, orderer):
+        """
+        Sets the MoveOrderer deciding in which order the moves of
+        a node are searched. None searches the moves in board order.
+        :param orderer: the MoveOrderer, or None.
+        """
+        self.orderer = orderer
+
+    def set_search_mode(self, mode):
+        """
+        Sets the search algorithm. MINIMAX is alpha beta minimax,
+        PVS is principal variation search, which searches the first
+        move with the full window and the rest with zero windows.
+        :param mode: MINIMAX or PVS.
+        """
+        if mode not in (MINIMAX, PVS):
+            raise ValueError("Unknown search mode: " + str(mode))
+        self.search_mode = mode
+
+    def set_batch_evaluation(self, enabled):
+        """
+        Sets whether the children of nodes at the last level before the
+        leaves are scored with one batched evaluator call. A batch is
+        cheaper per position, but all children are evaluated, also those
+        a cutoff would have skipped, so it is off by default.
+        :param enabled: True to evaluate the frontier in batches.
+        """
+        self.batch_frontier = enabled
+
+    def set_endgame_solver(self, solver):
+        """
+        Sets the EndgameSolver used instead of the heuristic search
+        when few squares are left. None always uses the heuristic search.
+        :param solver: the EndgameSolver, or None.
+        """
+        self.endgame = solver
+
+    def set_opening_book(self, book):
+        """
+        Sets the OpeningBook evaluate looks the position up in before
+        searching. None always searches.
+        :param book: the OpeningBook, or None.
+        """
+        self.book = book
+
+    def set_time_manager(self, manager):
+        """
+        Sets the TimeManager deciding when evaluate stops deepening.
+        None keeps starting new iterations until the deadline.
+        :param manager: the TimeManager, or None.
+        """
+        self.time_manager = manager
+
+    def set_statistics(self, statistics):
+        """
+        Sets the SearchStatistics collecting a record of every search
+        made by evaluate. None turns the instrumentation off.
+        :param statistics: the SearchStatistics, or None.
+        """
+        self.stats = statistics
+
+    def set_max_depth(self, depth):
+        """
+        Sets the deepest iteration evaluate searches, so the search
+        can be repeated to a fixed depth, e.g. in benchmarks. None
+        deepens until the time is up.
+        :param depth: The maximum depth, or None.
+        """
+        self.max_depth = depth
+
+    def set_parallel(self, workers, table_size=16):
+        """
+        Sets the number of worker processes the root moves are searched
+        on, see ParallelRootSearch. The workers use the current phase
+        evaluators. 0 searches in this process only.
+        :param workers: Number of worker processes.
+        :param table_size: Transposition table size of each worker in MB.
+        """
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+        if workers > 0:
+            self.parallel = ParallelRootSearch(workers, self.early_evaluator, self.late_evaluator, table_size)
+
+    def set_lazy_smp(self, workers, table_size=16):
+        """
+        Sets the number of worker processes for Lazy SMP, see
+        LazySMPSearch. With workers, evaluate lets them all search the
+        root with a shared transposition table instead of searching
+        itself. 0 searches in this process only.
+        :param workers: Number of worker processes.
+        :param table_size: Size of the shared transposition table in MB.
+        """
+        if self.smp is not None:
+            self.smp.close()
+            self.smp = None
+        if workers > 0:
+            self.smp = LazySMPSearch(workers, self.early_evaluator, self.late_evaluator, table_size)
+
+    def set_aspiration(self, window, widening):
+        """
+        Sets the aspiration window of the iterative deepening. From
+        the third iteration on, the search uses the window
+        (score - window, score + window) around the score found two
+        plies shallower. The evaluation swings between odd and even
+        depths, so the iteration right before is a worse guess. If
+        the score falls outside, the failing side is widened by
+        widening times and the depth is searched again.
+        :param window: Half width of the first window, 0 always uses the full window.
+        :param widening: Factor the window grows with on each re-search.
+        """
+        self.aspiration_window = window
+        self.aspiration_widening = widening
+
     
     def evaluate(self, othello_position, timeout):
         """
         Function implemented from the interface. 
         Used to call the minimax search function and returns 
         the best evaluated action/move to make.
+        A position found in the opening book (see set_opening_book)
+        is answered with the book move right away.
+        Close to the end of the game the position is solved exactly
+        by the endgame solver instead. It gets half of the time, if it
+        does not finish the heuristic search is used for the rest.
+        With worker processes (see set_parallel) each iteration
+        searches the root moves in parallel, without aspiration windows.
+        With Lazy SMP (see set_lazy_smp) the whole search is left to
+        the workers.
+
+        The deadline is watched by a SearchController, which aborts
+        the iteration running when the time is up. The best move of
+        the last completed iteration is returned, or the first legal
+        move if not even the first iteration completed. The time
+        manager (see set_time_manager) can stop the deepening earlier,
+        when the next iteration is not expected to finish in time, and
+        it stops once the whole rest of the game has been searched.
+
+        With statistics (see set_statistics) the search runs on an
+        instrumented copy of the position, and every iteration is
+        added to the record of the search. Iterations searched by
+        worker processes get the node, leaf and cutoff counts of
+        the workers, and with Lazy SMP the iterations of every worker
+        are recorded.
         :param othello_position: The initial position. 
+        :param timeout: Time at which the move has to be returned.
         :return: The best move.
         """
-        global move
+        stats = self.stats
+        if stats is not None:
+            stats.begin_search(othello_position, timeout)
+
+        if self.book is not None:
+            move = self.book.lookup(othello_position)
+            if move is not None:
+                if stats is not None:
+                    stats.end_search(move, 0, "book")
+                return move
+
+        if self.endgame is not None and self.endgame.should_solve(othello_position):
+            try:
+                move = self.endgame.solve(othello_position, time.time() + (timeout - time.time()) / 2)
+                if stats is not None:
+                    stats.end_search(move, 0, "endgame")
+                return move
+            except EndgameTimeout:
+                pass
+
+        E_markers = 16 - countBits((othello_position.white | othello_position.black) & CENTER)
+        early = E_markers >= 4
+        self.set_phase(early)
+
+        if self.smp is not None:
+            move = self.smp.search(othello_position, timeout, stats)
+            self.completed_depth = self.smp.completed_depth
+            if stats is not None:
+                stats.end_search(move, self.completed_depth, "lazy_smp")
+            return move
+
+        if stats is not None:
+            othello_position = stats.instrument(othello_position)
+            caches = [evaluator for evaluator in (self.early_evaluator, self.late_evaluator)
+                      if isinstance(evaluator, CachedEvaluator)]
+
+        move = self.__fallback_move(othello_position)
+        controller = SearchController(timeout)
+        self.completed_depth = 0
+
+        if self.table is not None:
+            self.table.new_search()
+        if self.orderer is not None:
+            self.orderer.new_search()
+        if self.parallel is not None:
+            self.parallel.new_search()
+
+        self.aspiration_researches = 0
+        scores = []
+
+        manager = self.time_manager
+        if manager is not None:
+            manager.start(timeout)
+
+        # Searching deeper than the number of empty squares gives the same result again
+        empties = 64 - countBits(othello_position.white | othello_position.black)
+
+        while not controller.expired() and (manager is None or manager.should_continue()) \
+                and (self.completed_depth == 0 or self.search_depth <= empties) \
+                and (self.max_depth is None or self.search_depth <= self.max_depth):
+            if early:
+                self.set_evaluator(self.early_evaluator)
+            else:
+                self.set_evaluator(self.late_evaluator)
+            self.prepare_evaluator(othello_position)
+            if stats is not None:
+                self.evaluator = stats.timed_evaluator(self.evaluator)
+                self.batch_evaluator = stats.timed_batch_evaluator(self.batch_evaluator)
+                stats.begin_iteration(self.search_depth, controller, self.table, caches)
+
+            mask = othello_position.get_moves()[0]
+            undo_depth = len(othello_position.history)
+            try:
+                if self.parallel is not None and mask:
+                    if self.orderer is not None:
+                        # The best move of the last iteration is searched first, it sets the bound of the others
+                        hash_move = NO_MOVE
+                        if self.completed_depth > 0 and not move.is_pass_move:
+                            hash_move = (move.row - 1) * 8 + (move.col - 1)
+                        squares = self.orderer.order(othello_position, mask, 0, hash_move)
+                    else:
+                        squares = [square for square in range(64) if mask >> square & 1]
+                    temp_action = self.parallel.search(othello_position, squares, self.search_depth,
+                                                       early, timeout, stats)
+                elif len(scores) < 2 or self.aspiration_window <= 0:
+                    temp_action = self.search(othello_position, -9999, 9999, controller)
+                else:
+                    temp_action = self.aspiration_search(othello_position, scores[-2], controller)
+            except SearchTimeout:
+                # Take back the moves of the aborted iteration
+                while len(othello_position.history) > undo_depth:
+                    othello_position.undo()
+                if stats is not None:
+                    stats.end_iteration(False, None, controller, self.table, caches)
+                break
+            if stats is not None:
+                stats.end_iteration(True, temp_action, controller, self.table, caches)
+            scores.append(temp_action.value)
+            move = temp_action
+            self.completed_depth = self.search_depth
+            if manager is not None:
+                manager.iteration_done(move, self.search_depth)
 
-        if othello_position.to_move():
-            move.value = -9999
-        else: 
-            move.value = 9999
+            depth = self.search_depth + 1
+            self.set_search_depth(depth)
 
-        while time.time() < timeout:
-            
-            E_markers = 0
-            for i in range(3,7):
-                for j in range(3,7):
-                    if othello_position.board[i][j] == 'E':
-                        E_markers += 1
-
-            if E_markers >= 4:
-                self.set_evaluator(EarlyGameEvalutor())
-            else:
-                self.set_evaluator(SuperSmartEvaluator())
+        if stats is not None:
+            stats.end_search(move, self.completed_depth, aspiration_researches=self.aspiration_researches)
+        return move
 
-            temp_action = self.minimax(othello_position, 0, -9999, 9999, timeout)
+    def __fallback_move(self, othello_position):
+        """
+        The move to play if no iteration completes before the deadline.
+        :param othello_position: The root position.
+        :return: The first legal move in the order of the move orderer, or a pass move.
+        """
+        mask = othello_position.get_moves()[0]
+        if not mask:
+            return OthelloAction(0, 0, True)
+        if self.orderer is not None:
+            square = self.orderer.order(othello_position, mask, 0)[0]
+        else:
+            square = (mask & -mask).bit_length() - 1
+        return OthelloAction(square // 8 + 1, square % 8 + 1)
 
-            if othello_position.to_move():
-                if temp_action.value > move.value:
-                    move = temp_action
-                    
+
+    def aspiration_search(self, othello_position, guess, controller):
+        """
+        Searches the root with a narrow window around a guessed score,
+        widening and searching again until the score is inside the
+        window. The number of re-searches is counted in
+        self.aspiration_researches.
+        :param othello_position: The root position.
+        :param guess: Expected score, from white's point of view.
+        :param controller: The SearchController watching the deadline.
+        :return: The best action, with a value from white's point of view.
+        """
+        delta = self.aspiration_window
+        alpha = max(guess - delta, -9999)
+        beta = min(guess + delta, 9999)
+
+        while True:
+            action = self.search(othello_position, alpha, beta, controller)
+
+            if action.value <= alpha and alpha > -9999:
+                delta *= self.aspiration_widening
+                alpha = max(action.value - delta, -9999)
+            elif action.value >= beta and beta < 9999:
+                delta *= self.aspiration_widening
+                beta = min(action.value + delta, 9999)
             else:
-                if temp_action.value < move.value:
-                    move = temp_action
+                return action
 
-            depth = self.search_depth + 1
-            g.set_search_depth(depth)
+            self.aspiration_researches += 1
 
-        return move
+    def search(self, othello_position, alpha, beta, controller):
+        """
+        Searches the position with the selected search mode.
+        :param othello_position: The root position.
+        :param alpha: Lower bound of the window, from white's point of view.
+        :param beta: Upper bound of the window, from white's point of view.
+        :param controller: The SearchController watching the deadline.
+        :return: The best action, with a value from white's point of view, as for minimax.
+        :raises SearchTimeout: If the deadline passes during the search.
+        """
+        if self.search_mode == MINIMAX:
+            return self.minimax(othello_position, 0, alpha, beta, controller)
+
+        if othello_position.to_move():
+            return self.pvs(othello_position, 0, alpha, beta, controller)
 
+        action = self.pvs(othello_position, 0, -beta, -alpha, controller)
+        action.value = -action.value
+        return action
     
-    def minimax(self, othello_position, depth, alpha, beta, timeout):
+    def minimax(self, othello_position, depth, alpha, beta, controller):
         """
         Function to represent a minimax algorithm. The minimax algorithm
         is used to find the best move to make in a othello game. 
@@ -111,90 +453,261 @@ class game(OthelloAlgorithm):
         :param depth: The current depth
         :param alpha: alpha value used to determine if we do not need to explore more nodes (used by max).
         :param beta: beta value used to determine if we do not need to explore more nodes (used by min).
+        :param controller: The SearchController, told about every node so it can abort the search.
         :return: The action with the most score.
+        :raises SearchTimeout: If the deadline passes during the search.
+
+        Positions already searched deep enough are looked up in the
+        transposition table. An exact score is returned directly, a
+        bound narrows the window. The root is always searched, since
+        a move has to be returned from it. The moves are searched in
+        the order given by the move orderer, starting with the best
+        move stored in the table. With batch evaluation, all children
+        at the last level before the leaves are scored in one call.
         """
 
+        controller.tick()
+
         _min = 9999
         _max = -9999
 
         if depth >= self.search_depth:
             action = OthelloAction(0,0)
-            action.value = self.evaluator(othello_position, timeout)
-            if action.value == None:
-                print_action()
+            action.value = self.evaluator(othello_position, controller.deadline)
             return action
 
-        valid_moves = othello_position.get_moves(timeout)
-
-        if valid_moves == None:
-            print_action()
-
-        if len(valid_moves) == 0:
+        alpha_orig = alpha
+        beta_orig = beta
+
+        hash_move = NO_MOVE
+        entry = None
+        if self.table is not None:
+            entry = self.table.probe(othello_position.hash)
+        if entry is not None:
+            hash_move = entry[3]
+            if depth > 0 and entry[0] >= self.search_depth - depth:
+                action = OthelloAction(0,0)
+                action.value = entry[2]
+                if entry[1] == EXACT:
+                    return action
+                if entry[1] == LOWER and entry[2] > alpha:
+                    alpha = entry[2]
+                elif entry[1] == UPPER and entry[2] < beta:
+                    beta = entry[2]
+                if alpha >= beta:
+                    return action
+
+        mask, valid_moves = othello_position.get_moves()
+
+        if mask == 0:
 
             action = OthelloAction(0,0,True)
 
-            action.value = self.evaluator(othello_position, timeout)
-            if action.value == None:
-                print_action()
+            action.value = self.evaluator(othello_position, controller.deadline)
             return action
 
+        if self.orderer is not None:
+            squares = self.orderer.order(othello_position, mask, depth, hash_move)
+            valid_moves = [OthelloAction(square // 8 + 1, square % 8 + 1) for square in squares]
+
         action = OthelloAction(0,0)
         
-        for move in valid_moves:
-            pos = othello_position.make_move(move, timeout)
-            if pos == None:
-                print_action()
-
-            temp_action = self.minimax(pos, depth+1, alpha, beta, timeout)
+        frontier = self.batch_frontier and depth + 1 >= self.search_depth
+        if frontier:
+            valid_moves = list(valid_moves)
+            values = self.__evaluate_frontier(othello_position, valid_moves)
+
+        for index, move in enumerate(valid_moves):
+            if frontier:
+                value = values[index]
+            else:
+                othello_position.apply(move)
+                value = self.minimax(othello_position, depth+1, alpha, beta, controller).value
+                othello_position.undo()
 
             if othello_position.to_move():
-                if temp_action.value > _max:
-                    move.value = _max = temp_action.value
+                if value > _max:
+                    move.value = _max = value
                     action = move
                 
                 if _max >= beta:
-                    move.value = _max
-                    return move
+                    self.__cutoff(othello_position, move, depth, index)
+                    break
 
                 if _max > alpha:
                     alpha = _max
 
             else:
-                if temp_action.value < _min:
-                    move.value = _min = temp_action.value
+                if value < _min:
+                    move.value = _min = value
                     action = move
 
                     if _min <= alpha:
-                        move.value = _min
-                        return move
+                        self.__cutoff(othello_position, move, depth, index)
+                        break
 
                     if _min < beta:
                         beta = _min
+
+        if self.table is not None:
+            if action.value <= alpha_orig:
+                bound = UPPER
+            elif action.value >= beta_orig:
+                bound = LOWER
+            else:
+                bound = EXACT
+            best = (action.row - 1) * 8 + action.col - 1 if action.row > 0 else NO_MOVE
+            self.table.store(othello_position.hash, self.search_depth - depth, bound, action.value, best)
             
         return action
 
-##########################################################
-move = OthelloAction(0, 0)
-if len(sys.argv) < 3:
-    print("Too few arguments")
-    exit()
+    def __evaluate_frontier(self, othello_position, moves):
+        """
+        Evaluates the positions after each of the moves with one call
+        to the batch evaluator.
+        :param othello_position: The position the moves are made in.
+        :param moves: The moves.
+        :return: List of evaluations, from white's point of view.
+        """
+        children = []
+        for move in moves:
+            othello_position.apply(move)
+            children.append(othello_position.clone())
+            othello_position.undo()
+        return self.batch_evaluator(children)
+
+    def __cutoff(self, othello_position, move, depth, index):
+        """
+        Tells the move orderer that a move caused a cutoff.
+        :param othello_position: The position the move was made in.
+        :param move: The move.
+        :param depth: The current depth.
+        :param index: Position of the move in the searched order.
+        """
+        if self.stats is not None:
+            self.stats.cutoffs += 1
+            if index == 0:
+                self.stats.first_move_cutoffs += 1
+        if self.orderer is not None:
+            square = (move.row - 1) * 8 + move.col - 1
+            self.orderer.cutoff(othello_position, square, depth, self.search_depth - depth, index)
+
+    def pvs(self, othello_position, depth, alpha, beta, controller):
+        """
+        Principal variation search (NegaScout), written in negamax
+        form: values are from the point of view of the player to move,
+        so max and min nodes share the same code.
+
+        The first move is searched with the full window. With good move
+        ordering it is usually the best one, so the remaining moves are
+        only tested with a zero window (alpha, alpha + 1) to prove that
+        they are not better. A move that fails high on that test is
+        searched again with the full window. With batch evaluation, all
+        children at the last level before the leaves are scored in one
+        call, and their exact scores need no zero window tests.
+
+        The transposition table is shared with minimax and holds scores
+        from white's point of view, they are converted when probing and
+        storing.
+
+        :param othello_position: The current position.
+        :param depth: The current depth.
+        :param alpha: Lower bound for the player to move.
+        :param beta: Upper bound for the player to move.
+        :param controller: The SearchController, told about every node so it can abort the search.
+        :return: The best action, with a value for the player to move.
+        :raises SearchTimeout: If the deadline passes during the search.
+        """
+        controller.tick()
+        sign = 1 if othello_position.to_move() else -1
 
-if len(sys.argv[1]) > 1 and len(sys.argv[1]) < 65 or len(sys.argv[1]) > 65:
-    print("Position string invalid.")
-    exit()
+        if depth >= self.search_depth:
+            action = OthelloAction(0,0)
+            action.value = self.evaluator(othello_position, controller.deadline)
+            action.value *= sign
+            return action
 
-# Check if position string is passed.
-elif len(sys.argv[1]) == 65:
-    pos = OthelloPosition(sys.argv[1])
+        alpha_orig = alpha
+        beta_orig = beta
+
+        hash_move = NO_MOVE
+        entry = None
+        if self.table is not None:
+            entry = self.table.probe(othello_position.hash)
+        if entry is not None:
+            hash_move = entry[3]
+            if depth > 0 and entry[0] >= self.search_depth - depth:
+                bound = entry[1]
+                if sign < 0 and bound != EXACT:
+                    bound = LOWER if bound == UPPER else UPPER
+                action = OthelloAction(0,0)
+                action.value = sign * entry[2]
+                if bound == EXACT:
+                    return action
+                if bound == LOWER and action.value > alpha:
+                    alpha = action.value
+                elif bound == UPPER and action.value < beta:
+                    beta = action.value
+                if alpha >= beta:
+                    return action
+
+        mask, valid_moves = othello_position.get_moves()
+
+        if mask == 0:
+            action = OthelloAction(0,0,True)
+            action.value = self.evaluator(othello_position, controller.deadline)
+            action.value *= sign
+            return action
 
-#Else init with the start posiiton.
-else:
-    pos = OthelloPosition()
-    pos.initialize()
+        if self.orderer is not None:
+            squares = self.orderer.order(othello_position, mask, depth, hash_move)
+            valid_moves = [OthelloAction(square // 8 + 1, square % 8 + 1) for square in squares]
 
-g = game(search_depth=1)
+        frontier = self.batch_frontier and depth + 1 >= self.search_depth
+        if frontier:
+            valid_moves = list(valid_moves)
+            values = self.__evaluate_frontier(othello_position, valid_moves)
 
-timeout = time.time() + int(sys.argv[2])
+        action = None
 
-move = g.evaluate(pos, timeout)
-print_action()
+        for index, move in enumerate(valid_moves):
+            if frontier:
+                value = sign * values[index]
+            else:
+                othello_position.apply(move)
+                if index == 0:
+                    value = -self.pvs(othello_position, depth+1, -beta, -alpha, controller).value
+                else:
+                    value = -self.pvs(othello_position, depth+1, -alpha-1, -alpha, controller).value
+                    if alpha < value < beta:
+                        value = -self.pvs(othello_position, depth+1, -beta, -alpha, controller).value
+                othello_position.undo()
+
+            if action is None or value > action.value:
+                move.value = value
+                action = move
+
+            if value > alpha:
+                alpha = value
+
+            if alpha >= beta:
+                self.__cutoff(othello_position, move, depth, index)
+                break
+
+        if self.table is not None:
+            if action.value <= alpha_orig:
+                bound = UPPER if sign > 0 else LOWER
+            elif action.value >= beta_orig:
+                bound = LOWER if sign > 0 else UPPER
+            else:
+                bound = EXACT
+            best = (action.row - 1) * 8 + action.col - 1
+            self.table.store(othello_position.hash, self.search_depth - depth, bound, sign * action.value, best)
+
+        return action
+
+##########################################################
+# Run as a script, see Engine.main. Worker processes of the parallel search import this module.
+if __name__ == "__main__":
+    from Engine import main
+    main(sys.argv)
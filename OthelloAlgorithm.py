@@ -38,3 +38,13 @@ class OthelloAlgorithm(ABC):
         :return: Nothing
         """
         pass
+
+    @abstractmethod
+    def set_search_mode(self, mode):
+        """
+        Selects which search algorithm to use, for algorithms that implement more than one (e.g. plain alpha-beta and
+        principal variation search).
+        :param mode: name of the search algorithm
+        :return: Nothing
+        """
+        pass
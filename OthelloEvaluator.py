@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import numpy as np
 
 
 class OthelloEvaluator(ABC):
@@ -19,3 +20,120 @@ class OthelloEvaluator(ABC):
         :return: An integer representing a heuristic evaluation of the position
         """
         pass
+
+    def prepare(self, othello_position):
+        """
+        Called with the root position before a search. Evaluators that let the position keep running totals (see
+        OthelloPosition.track_weights) set them up here, the default does nothing.
+        :param othello_position: The root OthelloPosition
+        """
+        pass
+
+    def evaluate_batch(self, othello_positions):
+        """
+        Evaluate several OthelloPositions in one call. Evaluators that can score a whole stack of boards at once
+        should override this, the default evaluates the positions one by one.
+        :param othello_positions: A list of OthelloPositions
+        :return: A list with the evaluation of each position
+        """
+        return [self.evaluate(othello_position) for othello_position in othello_positions]
+
+
+class WeightedEvaluator(OthelloEvaluator):
+    """
+    An evaluator that scores a position from sums over the squares of each color. FEATURES is a (64, k) array with one
+    row per square (in bitboard order) and one column per sum: column 0 is the weight of the square and column 1 is
+    1, to count the markers. WEIGHTS is column 0 as a list. Subclasses set both and turn the sums of the two colors
+    into scores in combine, which is used for single positions and batches alike.
+
+    With incremental, prepare makes the root position keep the sums of WEIGHTS up to date with every move (see
+    OthelloPosition.track_weights), and positions searched from it are evaluated from those sums instead of scanning
+    the board.
+
+    Author: dv18mln
+    """
+
+    FEATURES = None
+    WEIGHTS = None
+
+    def __init__(self, incremental=False):
+        """
+        :param incremental: If True, prepare makes the root position keep the sums of WEIGHTS.
+        """
+        self.incremental = incremental
+
+    def prepare(self, othello_position):
+        """
+        Starts tracking the sums of WEIGHTS in the root position, if incremental.
+        :param othello_position: The root position.
+        """
+        if self.incremental and othello_position.weights is not self.WEIGHTS:
+            othello_position.track_weights(self.WEIGHTS)
+
+    def tracked_counts(self, othello_position):
+        """
+        The sums of FEATURES of a position that keeps the sums of WEIGHTS. Subclasses with more than the two first
+        columns compute the others here.
+        :param othello_position: The position.
+        :return: A tuple (white, black), each a sequence with one sum per column.
+        """
+        return ((othello_position.white_sum, othello_position.white_count),
+                (othello_position.black_sum, othello_position.black_count))
+
+    @abstractmethod
+    def combine(self, W, B):
+        """
+        Scores both colors from their sums. W[k] and B[k] are the sums of column k of FEATURES, numbers when a single
+        position is evaluated and numpy arrays with one entry per position for a batch, so combine may only use
+        arithmetic and comparisons. Comparisons give booleans, which count as 0 or 1.
+        :param W: The sums of the white markers.
+        :param B: The sums of the black markers.
+        :return: A tuple (W_score, B_score).
+        """
+        pass
+
+    def evaluate(self, othello_position, timeout=None):
+        """
+        Evaluates a position with combine, from the sums kept by the position if it tracks WEIGHTS and else with a
+        single matrix product of the markers and FEATURES.
+        :param othello_position: Position to evaluate.
+        :param timeout: Not used, the evaluation is a single step.
+        :return: The score of white if white is to move, else minus the score of black.
+        """
+        if othello_position.weights is self.WEIGHTS:
+            W, B = self.tracked_counts(othello_position)
+        else:
+            W, B = (unpack_bitboards([othello_position.white, othello_position.black]) @ self.FEATURES).tolist()
+        W_score, B_score = self.combine(W, B)
+
+        # Max - Min
+        if othello_position.to_move():
+            return W_score
+        return -B_score
+
+    def evaluate_batch(self, othello_positions):
+        """
+        Evaluates a list of positions at once, see evaluate. The boards are stacked into one (2N, 64) array of
+        markers, white rows first, and scored with a single matrix product.
+        :param othello_positions: Positions to evaluate.
+        :return: List of evaluations.
+        """
+        n = len(othello_positions)
+        bitboards = [p.white for p in othello_positions] + [p.black for p in othello_positions]
+        to_move = np.array([p.maxPlayer for p in othello_positions])
+
+        # One row per column of FEATURES, one entry per position
+        counts = (unpack_bitboards(bitboards) @ self.FEATURES).T
+        W_score, B_score = self.combine(counts[:, :n], counts[:, n:])
+        return np.where(to_move, W_score, -B_score).tolist()
+
+
+def unpack_bitboards(bitboards):
+    """
+    Expands bitboards to one 0/1 value per square, so evaluators can compute weighted sums over the board as matrix
+    products.
+    :param bitboards: A sequence of N bitboards.
+    :return: A uint8 array of shape (N, 64), column k is square k, i.e. (row, col) = (k // 8 + 1, k % 8 + 1).
+    """
+    data = np.asarray(bitboards, dtype='<u8').reshape(-1, 1)
+    return np.unpackbits(data.view(np.uint8), axis=1, bitorder='little')
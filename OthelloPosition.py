@@ -1,12 +1,44 @@
 import numpy as np
+import random
 from OthelloAction import OthelloAction
 from MoveHandler import *
-import time
+
+# Zobrist keys, one random 64-bit number per square and color plus one for black to move. The generator is seeded so a
+# position gets the same hash in every process and every run.
+__zobrist = random.Random(0x0DE11D)
+ZOBRIST_WHITE = [__zobrist.getrandbits(64) for square in range(64)]
+ZOBRIST_BLACK = [__zobrist.getrandbits(64) for square in range(64)]
+ZOBRIST_FLIP = [ZOBRIST_WHITE[square] ^ ZOBRIST_BLACK[square] for square in range(64)]
+ZOBRIST_BLACK_TO_MOVE = __zobrist.getrandbits(64)
+
+
+def zobrist_hash(white, black, max_player):
+    """
+    Compute the Zobrist hash of a position from scratch.
+    :param white: Bitboard of the white markers
+    :param black: Bitboard of the black markers
+    :param max_player: True if white has the move
+    :return: The hash as a 64-bit integer
+    """
+    h = 0 if max_player else ZOBRIST_BLACK_TO_MOVE
+    for bits, keys in ((white, ZOBRIST_WHITE), (black, ZOBRIST_BLACK)):
+        while bits:
+            low = bits & -bits
+            h ^= keys[low.bit_length() - 1]
+            bits ^= low
+    return h
+
 
 class OthelloPosition(object):
     """
-    This class is used to represent game positions. It uses a 2-dimensional char array for the board
-    and a Boolean to keep track of which player has the move.
+    This class is used to represent game positions. The board is stored as two 64-bit integers (bitboards), one
+    for the white markers and one for the black, and a Boolean keeps track of which player has the move. The square
+    at (row, col), with rows and columns numbered 1-8, is bit (row - 1) * 8 + (col - 1) of a bitboard. The position
+    also keeps a 64-bit Zobrist hash, updated with every move, to be used as a key for the position.
+
+    The number of markers of each color is kept up to date with every move. An evaluator can also ask the position to
+    keep the sum of a weight table over the squares of each color (see track_weights), so evaluating a position does
+    not have to scan the board.
 
     Author: Ola Ringdahl
     """
@@ -20,368 +52,232 @@ class OthelloPosition(object):
         """
         self.BOARD_SIZE = 8
         self.maxPlayer = True
-        self.board = np.array([['E' for col in range(self.BOARD_SIZE+2)] for row in range(self.BOARD_SIZE+2)])
-        if len(list(board_str)) >= 65:
+        self.white = 0
+        self.black = 0
+        self.history = []
+        self.weights = None
+        if len(board_str) >= 65:
             if board_str[0] == 'W':
                 self.maxPlayer = True
             else:
                 self.maxPlayer = False
-            for i in range(1, len(list(board_str))):
-                col = ((i - 1) % 8) + 1
-                row = (i - 1) // 8 + 1
-                # For convenience we use W and B in the board instead of X and O:
+            for i in range(1, 65):
+                # X and O in the string are black and white markers
                 if board_str[i] == 'X':
-                    self.board[row][col] = 'B'
+                    self.black |= 1 << (i - 1)
                 elif board_str[i] == 'O':
-                    self.board[row][col] = 'W'
+                    self.white |= 1 << (i - 1)
+        self.hash = self.compute_hash()
+        self.__recount()
+
+    @property
+    def board(self):
+        """
+        The board as a 10x10 array of 'W', 'B' and 'E', including an empty border, built from the bitboards.
+        This is a snapshot for callers that read the board square by square; writing to it does not change the
+        position.
+        :return: The board as a NumPy array
+        """
+        board = np.full((self.BOARD_SIZE + 2, self.BOARD_SIZE + 2), 'E')
+        for square in range(64):
+            bit = 1 << square
+            if self.white & bit:
+                board[square // 8 + 1][square % 8 + 1] = 'W'
+            elif self.black & bit:
+                board[square // 8 + 1][square % 8 + 1] = 'B'
+        return board
 
     def initialize(self):
         """
         Initializes the position by placing four markers in the middle of the board.
         :return: Nothing
         """
-        self.board[self.BOARD_SIZE // 2][self.BOARD_SIZE // 2] = 'W'
-        self.board[self.BOARD_SIZE // 2 + 1][self.BOARD_SIZE // 2 + 1] = 'W'
-        self.board[self.BOARD_SIZE // 2][self.BOARD_SIZE // 2 + 1] = 'B'
-        self.board[self.BOARD_SIZE // 2 + 1][self.BOARD_SIZE // 2] = 'B'
+        self.__set(self.BOARD_SIZE // 2, self.BOARD_SIZE // 2, True)
+        self.__set(self.BOARD_SIZE // 2 + 1, self.BOARD_SIZE // 2 + 1, True)
+        self.__set(self.BOARD_SIZE // 2, self.BOARD_SIZE // 2 + 1, False)
+        self.__set(self.BOARD_SIZE // 2 + 1, self.BOARD_SIZE // 2, False)
         self.maxPlayer = True
+        self.hash = self.compute_hash()
 
-    def make_move(self, action, timeout):
+    def track_weights(self, weights):
+        """
+        Keep the sum of a weight table over the white and the black markers in white_sum and black_sum. The sums are
+        computed once here and then updated with every move.
+        :param weights: A list of 64 numbers, one per square (in bitboard order), or None to stop tracking.
+        :return: Nothing
+        """
+        self.weights = weights
+        self.__recount()
+
+    def __recount(self):
+        """
+        Compute the marker counts and the weight sums from scratch
+        :return: Nothing
+        """
+        self.white_count = countBits(self.white)
+        self.black_count = countBits(self.black)
+        self.white_sum = 0
+        self.black_sum = 0
+        if self.weights is not None:
+            for square in range(64):
+                if self.white >> square & 1:
+                    self.white_sum += self.weights[square]
+                elif self.black >> square & 1:
+                    self.black_sum += self.weights[square]
+
+    def compute_hash(self):
+        """
+        Compute the Zobrist hash of the position from scratch. Moves keep self.hash up to date incrementally, so this
+        is only needed when a position is set up.
+        :return: The hash as a 64-bit integer
+        """
+        return zobrist_hash(self.white, self.black, self.maxPlayer)
+
+    def make_move(self, action):
         """
         Perform the move suggested by the OhelloAction action and return the new position. Observe that this also
         changes the player to move next.
         :param action: The move to make as an OthelloAction
         :return: The OthelloPosition resulting from making the move action in the current position.
         """
-
         pos = self.clone()
+        pos.apply(action)
+        return pos
+
+    def apply(self, action):
+        """
+        Perform the move suggested by the OthelloAction action in this position, without creating a new one. The
+        flipped markers are pushed on the undo stack together with the previous player to move, hash, marker counts and
+        weight sums, so the move can be taken back with undo(). A pass move only changes the player to move.
+        :param action: The move to make as an OthelloAction
+        :return: Nothing
+        """
+        state = (self.maxPlayer, self.hash, self.white_count, self.black_count, self.white_sum, self.black_sum)
 
         if action.is_pass_move:
-            return pos
-
-        pos.mark(action.row, action.col)
-
-        # Look for opponents marker, a bit of confusion
-        lookFor = 'B'
-        if pos.maxPlayer == False:
-            lookFor = 'W'
-
-        coords = []
-        coords.append(moveNorth(pos.board, lookFor, action.row, action.col))
-        if time.time() >= timeout:
-            return None
-        #if exit_var:
-        #    return -1
-        coords.append(moveSouth(pos.board, lookFor, action.row, action.col))
-        #if exit_var:
-        #    return -1
-        if time.time() >= timeout:
-            return None
-        coords.append(moveWest(pos.board, lookFor, action.row, action.col))
-        #if exit_var:
-        #    return -1
-        if time.time() >= timeout:
-            return None
-        coords.append(moveEast(pos.board, lookFor, action.row, action.col))
-        #if exit_var:
-        #    return -1
-        if time.time() >= timeout:
-            return None
-        coords.append(moveNorthwest(pos.board, lookFor, action.row, action.col))
-        #if exit_var:
-        #    return -1
-        if time.time() >= timeout:
-            return None
-        coords.append(moveNortheast(pos.board, lookFor, action.row, action.col))
-        #if exit_var:
-        #    return -1
-        if time.time() >= timeout:
-            return None
-        coords.append(moveSouthwest(pos.board, lookFor, action.row, action.col))
-        #if exit_var:
-        #    return -1
-        if time.time() >= timeout:
-            return None
-        coords.append(moveSoutheast(pos.board, lookFor, action.row, action.col))
-        #if exit_var:
-        #    return -1
-        if time.time() >= timeout:
-            return None
-
-        for coord in coords:
-            if len(coord) >= 2 and coord[0] != -1 and coord[1] != -1 or len(coord) == 1:
-                for move in coord:
-                    pos.mark(move[0], move[1])
-
-        if pos.to_move():
-            pos.maxPlayer = False
+            self.history.append((0, 0) + state)
+            self.maxPlayer = not self.maxPlayer
+            self.hash ^= ZOBRIST_BLACK_TO_MOVE
+            return
+
+        square = (action.row - 1) * 8 + action.col - 1
+        bit = 1 << square
+        h = self.hash ^ ZOBRIST_BLACK_TO_MOVE
+        if self.maxPlayer:
+            flipped = flipMask(square, self.white, self.black)
+            self.white |= flipped | bit
+            self.black ^= flipped
+            h ^= ZOBRIST_WHITE[square]
+        else:
+            flipped = flipMask(square, self.black, self.white)
+            self.black |= flipped | bit
+            self.white ^= flipped
+            h ^= ZOBRIST_BLACK[square]
+
+        weights = self.weights
+        gain = 0
+        rest = flipped
+        while rest:
+            low = rest & -rest
+            flip = low.bit_length() - 1
+            h ^= ZOBRIST_FLIP[flip]
+            if weights is not None:
+                gain += weights[flip]
+            rest ^= low
+
+        count = countBits(flipped)
+
+        if self.maxPlayer:
+            self.white_count += count + 1
+            self.black_count -= count
+            if weights is not None:
+                self.white_sum += gain + weights[square]
+                self.black_sum -= gain
         else:
-            pos.maxPlayer = True
+            self.black_count += count + 1
+            self.white_count -= count
+            if weights is not None:
+                self.black_sum += gain + weights[square]
+                self.white_sum -= gain
 
-        return pos
+        self.history.append((flipped, bit) + state)
+        self.maxPlayer = not self.maxPlayer
+        self.hash = h
+
+    def undo(self):
+        """
+        Take back the last move made with apply()
+        :return: Nothing
+        """
+        flipped, bit, self.maxPlayer, self.hash, self.white_count, self.black_count, self.white_sum, self.black_sum = \
+            self.history.pop()
+        if self.maxPlayer:
+            self.white ^= flipped | bit
+            self.black |= flipped
+        else:
+            self.black ^= flipped | bit
+            self.white |= flipped
 
     """
     Mark the given coordinate to my color.
     """
     def mark(self, row, col):
-        my_color = 'W'
-        if self.maxPlayer == False:
-            my_color = 'B'
-        self.board[row][col] = my_color
-
-        
-    def get_moves(self, timeout):
-        """
-        Get all possible moves for the current position
-        :return: A list of OthelloAction representing all possible moves in the position. If the
-        list is empty, there are no legal moves for the player who has the move.
-        """
-        moves = []
-        append = moves.append
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-
-                if time.time() >= timeout:
-                    return None
-
-                if self.__is_candidate(i + 1, j + 1) and self.__is_move(i + 1, j + 1):
-                    append(OthelloAction(i + 1, j + 1))
-    
-        return moves
+        self.__set(row, col, self.maxPlayer)
 
-    def __is_candidate(self, row, col):
+    def __set(self, row, col, white):
         """
-        Check if a position is a candidate for a move (not empty and has a neighbour)
+        Put a marker on a square, replacing any marker of the other color
         :param row: The row of the board position
         :param col: The column of the board position
-        :return: True if it is a candidate
+        :param white: True for a white marker, False for a black one
+        :return: Nothing
         """
-        if self.board[row][col] != 'E':
-            return False
-        if self.__has_neighbour(row, col):
-            return True
-        return False
+        square = (row - 1) * 8 + col - 1
+        bit = 1 << square
+        if self.white & bit:
+            self.hash ^= ZOBRIST_WHITE[square]
+        elif self.black & bit:
+            self.hash ^= ZOBRIST_BLACK[square]
+        if white:
+            self.white |= bit
+            self.black &= ~bit
+            self.hash ^= ZOBRIST_WHITE[square]
+        else:
+            self.black |= bit
+            self.white &= ~bit
+            self.hash ^= ZOBRIST_BLACK[square]
+        self.__recount()
 
-    def __is_move(self, row, col):
+    def get_moves(self):
         """
-        Check if it is possible to do a move from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if row < 1 or row > self.BOARD_SIZE or col < 1 or col > self.BOARD_SIZE:
-            return False
-        if self.__check_north(row, col):
-            return True
-        if self.__check_north_east(row, col):
-            return True
-        if self.__check_east(row, col):
-            return True
-        if self.__check_south_east(row, col):
-            return True
-        if self.__check_south(row, col):
-            return True
-        if self.__check_south_west(row, col):
-            return True
-        if self.__check_west(row, col):
-            return True
-        if self.__check_north_west(row, col):
-            return True
-
-    def __check_north(self, row, col):
-        """
-        Check if it is possible to do a move to the north from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row - 1, col):
-            return False
-        i = row - 2
-        while i > 0:
-            if self.board[i][col] == 'E':
-                return False
-            if self.__is_own_square(i, col):
-                return True
-            i -= 1
-        return False
-
-    def __check_north_east(self, row, col):
-        """
-        Check if it is possible to do a move to the north east from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row - 1, col + 1):
-            return False
-        i = 2
-        while row - i > 0 and col + i <= self.BOARD_SIZE:
-            if self.board[row - i][col + i] == 'E':
-                return False
-            if self.__is_own_square(row - i, col + i):
-                return True
-            i += 1
-        return False
-
-    def __check_north_west(self, row, col):
-        """
-        Check if it is possible to do a move to the north west from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row - 1, col - 1):
-            return False
-        i = 2
-        while row - i > 0 and col - i > 0:
-            if self.board[row - i][col - i] == 'E':
-                return False
-            if self.__is_own_square(row - i, col - i):
-                return True
-            i += 1
-        return False
-
-    def __check_south(self, row, col):
-        """
-        Check if it is possible to do a move to the south from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row + 1, col):
-            return False
-        i = row + 2
-        while i <= self.BOARD_SIZE:
-            if self.board[i][col] == 'E':
-                return False
-            if self.__is_own_square(i, col):
-                return True
-            i += 1
-        return False
-
-    def __check_south_east(self, row, col):
-        """
-        Check if it is possible to do a move to the south east from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row + 1, col + 1):
-            return False
-        i = 2
-        while row + i <= self.BOARD_SIZE and col + i <= self.BOARD_SIZE:
-            if self.board[row + i][col + i] == 'E':
-                return False
-            if self.__is_own_square(row + i, col + i):
-                return True
-            i += 1
-        return False
-
-    def __check_south_west(self, row, col):
-        """
-        Check if it is possible to do a move to the south west from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row + 1, col - 1):
-            return False
-        i = 2
-        while row + i <= self.BOARD_SIZE and col - i > 0:
-            if self.board[row + i][col - i] == 'E':
-                return False
-            if self.__is_own_square(row + i, col - i):
-                return True
-            i += 1
-        return False
-
-    def __check_west(self, row, col):
-        """
-        Check if it is possible to do a move to the west from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row, col - 1):
-            return False
-        i = col - 2
-        while i > 0:
-            if self.board[row][i] == 'E':
-                return False
-            if self.__is_own_square(row, i):
-                return True
-            i -= 1
-        return False
-
-    def __check_east(self, row, col):
-        """
-        Check if it is possible to do a move to the east from this position
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it is possible to do a move
-        """
-        if not self.__is_opponent_square(row, col + 1):
-            return False
-        i = col + 2
-        while i <= self.BOARD_SIZE:
-            if self.board[row][i] == 'E':
-                return False
-            if self.__is_own_square(row, i):
-                return True
-            i += 1
-        return False
-
-    def __is_opponent_square(self, row, col):
-        """
-        Check if the position is occupied by the opponent
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if opponent square
+        Get all possible moves for the current position. The legal squares are found all at once from the bitboards.
+        :return: A tuple (mask, moves). mask has one bit set for every legal square and moves lazily yields an
+        OthelloAction for each of them in row-major order. If mask is 0, there are no legal moves for the player who
+        has the move.
         """
-        if self.maxPlayer and self.board[row][col] == 'B':
-            return True
-        if not self.maxPlayer and self.board[row][col] == 'W':
-            return True
-        return False
+        mask = legalMoves(*self.__sides())
+        return mask, self.__actions(mask)
 
-    def __is_own_square(self, row, col):
+    def __actions(self, mask):
         """
-        Check if the position is occupied by the player
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if it's your own square
+        Generate the moves in a move mask
+        :param mask: Bitboard of legal squares
+        :return: A generator of OthelloAction, lowest square first
         """
-        if not self.maxPlayer and self.board[row][col] == 'B':
-            return True
-        if self.maxPlayer and self.board[row][col] == 'W':
-            return True
-        return False
+        while mask:
+            bit = mask & -mask
+            square = bit.bit_length() - 1
+            yield OthelloAction(square // 8 + 1, square % 8 + 1)
+            mask ^= bit
 
-    def __has_neighbour(self, row, col):
+    def __sides(self):
         """
-        Check if the position has any non-empty squares
-        :param row: The row of the board position
-        :param col: The column of the board position
-        :return: True if has neighbours
-        """
-        if self.board[row - 1][col] != 'E':
-            return True
-        if self.board[row - 1, col + 1] != 'E':
-            return True
-        if self.board[row - 1][col - 1] != 'E':
-            return True
-        if self.board[row][col - 1] != 'E':
-            return True
-        if self.board[row][col + 1] != 'E':
-            return True
-        if self.board[row + 1][col - 1] != 'E':
-            return True
-        if self.board[row + 1][col + 1] != 'E':
-            return True
-        if self.board[row + 1][col] != 'E':
-            return True
-        return False
+        Get the bitboards of the player to move and of the opponent
+        :return: A tuple (own, opponent)
+        """
+        if self.maxPlayer:
+            return self.white, self.black
+        return self.black, self.white
 
     def to_move(self):
         """
@@ -390,17 +286,55 @@ class OthelloPosition(object):
         """
         return self.maxPlayer
 
+    @staticmethod
+    def from_bitboards(white, black, max_player):
+        """
+        Creates a position from its bitboards
+        :param white: Bitboard of the white markers
+        :param black: Bitboard of the black markers
+        :param max_player: True if white has the move
+        :return: A new OthelloPosition
+        """
+        ot = OthelloPosition("")
+        ot.white = white
+        ot.black = black
+        ot.maxPlayer = max_player
+        ot.hash = ot.compute_hash()
+        ot.track_weights(None)
+        return ot
+
     def clone(self):
         """
-        Copy the current position
+        Copy the current position. The undo stack is not copied.
         :return: A new OthelloPosition, identical to the current one.
         """
         ot = OthelloPosition("")
-        ot.board = np.copy(self.board)
+        ot.white = self.white
+        ot.black = self.black
         ot.maxPlayer = self.maxPlayer
-        #print("OT Size: ", self.board.shape)
+        ot.hash = self.hash
+        ot.weights = self.weights
+        ot.white_count = self.white_count
+        ot.black_count = self.black_count
+        ot.white_sum = self.white_sum
+        ot.black_sum = self.black_sum
         return ot
 
+    def to_string(self):
+        """
+        The position as a string in the format read by __init__
+        :return: A string of length 65
+        """
+        squares = ['W' if self.maxPlayer else 'B']
+        for square in range(64):
+            if self.white >> square & 1:
+                squares.append('O')
+            elif self.black >> square & 1:
+                squares.append('X')
+            else:
+                squares.append('E')
+        return ''.join(squares)
+
     def print_board(self):
         """
         Prints the current board. Do not use when running othellostart (it will crash)
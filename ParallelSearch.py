@@ -0,0 +1,338 @@
+from OthelloPosition import OthelloPosition
+from OthelloAction import OthelloAction
+from TranspositionTable import SharedTranspositionTable
+from SearchController import SearchController, SearchTimeout
+from MoveOrdering import MoveOrderer
+from SearchStatistics import SearchStatistics
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+# Lazy SMP workers start at depths 1 to SMP_START_DEPTHS.
+SMP_START_DEPTHS = 3
+
+# State of a worker process, set up by _init_worker or _init_smp_worker.
+_engine = None
+_bound = None
+_stats = None
+_generation = None
+
+
+def _init_worker(bound, early, late, table_size):
+    """
+    Sets up a worker process: a search engine with its own transposition table and the shared bound. The engine
+    counts its cutoffs in a SearchStatistics, so they can be reported with the search.
+    :param bound: Shared best score so far, from the point of view of the player to move at the root.
+    :param early: Evaluator for the early part of the game.
+    :param late: Evaluator for the rest of the game.
+    :param table_size: Size of the transposition table of the worker in MB.
+    """
+    global _engine, _bound, _stats
+    # Imported here, the worker only needs the search engine once it runs
+    from Othello import game
+    _engine = game(search_depth=1, table_size=table_size)
+    _engine.set_phase_evaluators(early, late)
+    _engine.set_endgame_solver(None)
+    _bound = bound
+    _stats = SearchStatistics()
+    _engine.set_statistics(_stats)
+
+
+class _BoundRaised(Exception):
+    """
+    Raised by _BoundController when another worker has raised the shared bound.
+    """
+    pass
+
+
+class _BoundController(SearchController):
+    """
+    The SearchController of a worker searching a root move. Besides the deadline it watches the shared bound, and
+    aborts the search with _BoundRaised when another worker has found a better score than the one the window was cut
+    at, so the move can be searched again with the narrower window.
+    """
+
+    def __init__(self, deadline):
+        """
+        :param deadline: Time at which the search has to stop.
+        """
+        SearchController.__init__(self, deadline)
+        self.bound = _bound.value
+
+    def check(self):
+        SearchController.check(self)
+        if _bound.value > self.bound:
+            raise _BoundRaised()
+
+
+def _table_lookups():
+    """
+    :return: A tuple (probes, hits) of the transposition table of the worker.
+    """
+    table = _engine.table
+    return (table.probes, table.hits) if table is not None else (0, 0)
+
+
+def _search_root_move(white, black, white_to_move, square, depth, early, generation, timeout, instrument=False):
+    """
+    Searches the subtree of one root move with minimax. The window is cut at the best score the other workers have
+    found so far, and a better exact score is shared with them. If the shared score rises during the search, the
+    search is started again with the narrower window; the transposition table keeps most of the work already done.
+    The first subtree a worker searches for a new root position starts a new search of its table and move orderer,
+    as game.evaluate does.
+    :param white: Bitboard of the white markers at the root.
+    :param black: Bitboard of the black markers at the root.
+    :param white_to_move: True if white has the move at the root.
+    :param square: The root move, (row - 1) * 8 + (col - 1).
+    :param depth: Search depth, counted from the root.
+    :param early: True to use the early game evaluator.
+    :param generation: Number of the search of the root position, see ParallelRootSearch.new_search.
+    :param timeout: Time at which the search should stop.
+    :param instrument: True to count the leaves and time the evaluation, see SearchStatistics.timed_evaluator.
+    :return: A tuple (square, value, exact, counts), value is from white's point of view and exact is False if it is
+    only a bound because the move was no better than the shared score. value is None if the timeout was reached.
+    counts is a tuple (nodes, leaves, cutoffs, first move cutoffs, evaluation time, table probes, table hits) of the
+    search, see SearchStatistics.add_worker_counts. The leaves and the evaluation time are 0 unless instrument is
+    True.
+    """
+    global _generation
+    if generation != _generation:
+        _generation = generation
+        if _engine.table is not None:
+            _engine.table.new_search()
+        if _engine.orderer is not None:
+            _engine.orderer.new_search()
+    _engine.set_phase(early)
+    position = OthelloPosition.from_bitboards(white, black, white_to_move)
+    _engine.set_evaluator(_engine.early_evaluator if early else _engine.late_evaluator)
+    _engine.prepare_evaluator(position)
+    if instrument:
+        _engine.evaluator = _stats.timed_evaluator(_engine.evaluator)
+        _engine.batch_evaluator = _stats.timed_batch_evaluator(_engine.batch_evaluator)
+    before = (_stats.leaves, _stats.cutoffs, _stats.first_move_cutoffs, _stats.evaluation_time) + _table_lookups()
+    _engine.set_search_depth(depth)
+    position.apply(OthelloAction(square // 8 + 1, square % 8 + 1))
+    undo_depth = len(position.history)
+
+    sign = 1 if white_to_move else -1
+    controller = _BoundController(timeout)
+    while True:
+        controller.bound = _bound.value
+        best = sign * controller.bound
+        if white_to_move:
+            alpha, beta = best, 9999
+        else:
+            alpha, beta = -9999, best
+        try:
+            value = _engine.minimax(position, 1, alpha, beta, controller).value
+            break
+        except SearchTimeout:
+            value = None
+            break
+        except _BoundRaised:
+            while len(position.history) > undo_depth:
+                position.undo()
+    after = (_stats.leaves, _stats.cutoffs, _stats.first_move_cutoffs, _stats.evaluation_time) + _table_lookups()
+    counts = (controller.node_count(),) + tuple(count - count_before for count, count_before in zip(after, before))
+    if value is None:
+        return square, None, False, counts
+
+    exact = alpha < value < beta
+    if exact:
+        with _bound.get_lock():
+            if sign * value > _bound.value:
+                _bound.value = sign * value
+    return square, value, exact, counts
+
+
+class ParallelRootSearch(object):
+    """
+    Searches the moves of the root position in parallel on a pool of worker processes. Each worker searches the
+    subtree of one root move with minimax. The best score found so far is kept in shared memory, and every subtree
+    search starts with its window cut at that score, so later moves are refuted as fast as in a serial search once a
+    good move is known. The first move is searched on its own before the others are handed out, so they all start with
+    a bound, and a worker whose bound is raised by another during its search narrows its window.
+
+    Only the bitboards, the move and a few numbers are sent to a worker, and each worker keeps its own transposition
+    table between searches. The workers count their nodes, leaves, cutoffs and table lookups, and the totals are added
+    to the SearchStatistics given to search.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, workers, early, late, table_size=16):
+        """
+        :param workers: Number of worker processes.
+        :param early: Evaluator for the early part of the game, see game.set_phase_evaluators.
+        :param late: Evaluator for the rest of the game.
+        :param table_size: Size of the transposition table of each worker in MB.
+        """
+        self.workers = workers
+        self.generation = 0
+        self.bound = multiprocessing.Value('i', -9999)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(self.bound, early, late, table_size))
+
+    def new_search(self):
+        """
+        Starts the search of a new root position. The workers age the entries of their transposition tables and the
+        history of their move orderers when they get the first move of it.
+        """
+        self.generation += 1
+
+    def search(self, othello_position, squares, depth, early, timeout, statistics=None):
+        """
+        Searches one iteration of the root position, see new_search.
+        :param othello_position: The root position, it must have at least one legal move.
+        :param squares: The legal moves of the root, in the order they should be searched.
+        :param depth: Search depth.
+        :param early: True to use the early game evaluator.
+        :param timeout: Time at which the search should stop.
+        :param statistics: A SearchStatistics to add the counts of the workers to, or None.
+        :return: The best action, with a value from white's point of view.
+        :raises SearchTimeout: If the timeout was reached before all moves were searched.
+        """
+        self.bound.value = -9999
+        white_to_move = othello_position.to_move()
+        instrument = statistics is not None
+        futures = [self.pool.submit(_search_root_move, othello_position.white, othello_position.black,
+                                    white_to_move, squares[0], depth, early, self.generation, timeout, instrument)]
+        # The first move is usually the best, its score is the bound every other move starts with
+        futures[0].result()
+        futures += [self.pool.submit(_search_root_move, othello_position.white, othello_position.black,
+                                     white_to_move, square, depth, early, self.generation, timeout, instrument)
+                    for square in squares[1:]]
+
+        sign = 1 if white_to_move else -1
+        best = None
+        timed_out = False
+        for future in futures:
+            square, value, exact, counts = future.result()
+            if statistics is not None:
+                statistics.add_worker_counts(*counts)
+            if value is None:
+                timed_out = True
+                continue
+            # An exact score beats a bound with the same value, otherwise the first move searched is kept
+            if best is None or (sign * value, exact) > (sign * best[1], best[2]):
+                best = (square, value, exact)
+        if timed_out:
+            raise SearchTimeout()
+
+        action = OthelloAction(best[0] // 8 + 1, best[0] % 8 + 1)
+        action.value = best[1]
+        return action
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        self.pool.shutdown()
+
+
+def _init_smp_worker(table_name, table_size, early, late):
+    """
+    Sets up a worker process of the Lazy SMP search: a search engine using the shared transposition table, and the
+    SearchStatistics it records its searches in when asked to.
+    :param table_name: Name of the shared memory of the table.
+    :param table_size: Size of the table in MB.
+    :param early: Evaluator for the early part of the game.
+    :param late: Evaluator for the rest of the game.
+    """
+    global _engine, _stats
+    from Othello import game
+    _engine = game(search_depth=1, table_size=0)
+    _engine.table = SharedTranspositionTable(table_size, table_name)
+    _engine.set_phase_evaluators(early, late)
+    _engine.set_endgame_solver(None)
+    _stats = SearchStatistics()
+
+
+def _smp_search(white, black, white_to_move, worker, generation, timeout, instrument=False):
+    """
+    Runs the iterative deepening search of one Lazy SMP worker. Worker 0 searches like a single process would, the
+    others start deeper and order their moves with history noise seeded by the worker number.
+    :param white: Bitboard of the white markers at the root.
+    :param black: Bitboard of the black markers at the root.
+    :param white_to_move: True if white has the move at the root.
+    :param worker: Number of the worker, 0 to workers - 1.
+    :param generation: Generation of the shared table for this search.
+    :param timeout: Time at which the search should stop.
+    :param instrument: True to record the search, see SearchStatistics.
+    :return: A tuple (row, col, is_pass_move, value, depth, record), depth is the deepest iteration completed and
+    record the record of the search, None unless instrument is True.
+    """
+    position = OthelloPosition.from_bitboards(white, black, white_to_move)
+    seed = worker if worker > 0 else None
+    if _engine.orderer.seed != seed:
+        _engine.set_move_orderer(MoveOrderer(seed))
+    _engine.set_search_depth(1 + worker % SMP_START_DEPTHS)
+    # game.evaluate starts a new table generation, all workers should end up on the same one
+    _engine.table.generation = (generation - 1) & 0xFF
+    # The shared table is cleared by LazySMPSearch.search when the phase changes, not by every worker
+    _engine.phase = None
+    _engine.set_statistics(_stats if instrument else None)
+    action = _engine.evaluate(position, timeout)
+    record = _stats.records.pop() if instrument else None
+    return action.row, action.col, action.is_pass_move, action.value, _engine.completed_depth, record
+
+
+class LazySMPSearch(object):
+    """
+    Lazy SMP: several worker processes run the whole iterative deepening search on the same root, sharing one
+    transposition table in shared memory. The workers do not divide the work between them, but the results each one
+    stores in the table let the others skip or order parts of their trees. So they are not searching the same tree at
+    the same time, the workers start at different depths and each orders its moves with its own history noise, see
+    _smp_search. The move of the worker that completed the deepest iteration is played.
+
+    Unlike ParallelRootSearch this does not depend on the root having many moves.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, workers, early, late, table_size=16):
+        """
+        :param workers: Number of worker processes.
+        :param early: Evaluator for the early part of the game, see game.set_phase_evaluators.
+        :param late: Evaluator for the rest of the game.
+        :param table_size: Size of the shared transposition table in MB.
+        """
+        self.workers = workers
+        self.completed_depth = 0
+        self.table = SharedTranspositionTable(table_size)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_smp_worker,
+                                        initargs=(self.table.name, table_size, early, late))
+
+    def search(self, othello_position, timeout, statistics=None):
+        """
+        Searches the root position until the timeout. The depth of the deepest search is kept in completed_depth.
+        :param othello_position: The root position.
+        :param timeout: Time at which the search should stop.
+        :param statistics: A SearchStatistics to add the iterations of the workers to, or None.
+        :return: The best action of the deepest search, with a value from white's point of view.
+        """
+        self.table.new_search()
+        futures = [self.pool.submit(_smp_search, othello_position.white, othello_position.black,
+                                    othello_position.to_move(), worker, self.table.generation, timeout,
+                                    statistics is not None)
+                   for worker in range(self.workers)]
+
+        best = None
+        for worker, future in enumerate(futures):
+            result = future.result()
+            if statistics is not None:
+                statistics.add_worker_search(worker, result[5])
+            if best is None or result[4] > best[4]:
+                best = result
+
+        row, col, is_pass_move, value, self.completed_depth, record = best
+        action = OthelloAction(row, col, is_pass_move)
+        action.value = value
+        return action
+
+    def close(self):
+        """
+        Stops the worker processes and frees the shared table.
+        """
+        self.pool.shutdown()
+        self.table.close()
+        self.table.unlink()
@@ -0,0 +1,163 @@
+from OthelloEvaluator import OthelloEvaluator, unpack_bitboards
+from SuperSmartEvaluator import SuperSmartEvaluator
+import numpy as np
+import struct
+
+WEIGHTS_MAGIC = b'OTPW'
+WEIGHTS_VERSION = 1
+
+
+def __symmetries(row, col):
+    """
+    The 8 images of a square under the symmetries of the board (0-based row and column).
+    """
+    images = []
+    for r, c in ((row, col), (col, row)):
+        images += [(r, c), (r, 7 - c), (7 - r, c), (7 - r, 7 - c)]
+    return images
+
+
+def __instances(base):
+    """
+    All distinct placements of a pattern on the board. A placement is a list of squares, in the same order as the
+    squares of the base pattern so the same index means the same configuration.
+    """
+    placements = []
+    seen = set()
+    for k in range(8):
+        squares = [__symmetries(r, c)[k] for r, c in base]
+        key = frozenset(squares)
+        if key not in seen:
+            seen.add(key)
+            placements.append([r * 8 + c for r, c in squares])
+    return placements
+
+
+# The pattern groups, each given by one placement as (row, col) pairs counted from 0. All placements of a group share
+# one weight table.
+PATTERNS = [
+    ('edge+2x', [(0, c) for c in range(8)] + [(1, 1), (1, 6)]),
+    ('corner3x3', [(r, c) for r in range(3) for c in range(3)]),
+    ('corner2x5', [(r, c) for r in range(2) for c in range(5)]),
+    ('row2', [(1, c) for c in range(8)]),
+    ('row3', [(2, c) for c in range(8)]),
+    ('row4', [(3, c) for c in range(8)]),
+    ('diag8', [(i, i) for i in range(8)]),
+    ('diag7', [(i, i + 1) for i in range(7)]),
+    ('diag6', [(i, i + 2) for i in range(6)]),
+    ('diag5', [(i, i + 3) for i in range(5)]),
+    ('diag4', [(i, i + 4) for i in range(4)]),
+]
+
+PATTERN_LENGTHS = [len(base) for name, base in PATTERNS]
+TABLE_SIZES = [3 ** length for length in PATTERN_LENGTHS]
+TABLE_OFFSETS = np.cumsum([0] + TABLE_SIZES[:-1])
+
+# One row per placement: the squares, padded with square 64 which is always empty, the power of 3 of each square, and
+# where the table of the group starts in the flattened weights.
+__placements = [(group, squares) for group, (name, base) in enumerate(PATTERNS) for squares in __instances(base)]
+MAX_LENGTH = max(PATTERN_LENGTHS)
+PLACEMENT_SQUARES = np.array([squares + [64] * (MAX_LENGTH - len(squares)) for group, squares in __placements])
+PLACEMENT_POWERS = np.array([[3 ** k if k < len(squares) else 0 for k in range(MAX_LENGTH)]
+                             for group, squares in __placements])
+PLACEMENT_OFFSETS = np.array([TABLE_OFFSETS[group] for group, squares in __placements])
+
+
+def default_weights():
+    """
+    Weight tables to use when no trained weights are available. A configuration scores the SuperSmartEvaluator tile
+    weight of each square, positive for white markers and negative for black.
+    :return: List of int16 arrays, one per pattern group.
+    """
+    tables = []
+    for name, base in PATTERNS:
+        tiles = [SuperSmartEvaluator.tile_score[r + 1][c + 1] for r, c in base]
+        table = np.zeros(1, dtype=np.int64)
+        # Extend the table one square at a time: the new square is the most significant base-3 digit
+        for tile in tiles:
+            table = np.concatenate([table, table + tile, table - tile])
+        tables.append(table.astype(np.int16))
+    return tables
+
+
+def load_weights(path):
+    """
+    Reads weight tables from a file. The format is little-endian: the magic 'OTPW', a uint16 version and a uint16
+    number of tables, then for each table a uint8 pattern length n followed by 3^n int16 weights.
+    :param path: The file to read.
+    :return: List of int16 arrays, one per pattern group.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, count = struct.unpack_from('<4sHH', data, 0)
+    if magic != WEIGHTS_MAGIC or version != WEIGHTS_VERSION:
+        raise ValueError("Not a pattern weight file: " + str(path))
+    if count != len(PATTERNS):
+        raise ValueError("Expected %d weight tables, found %d" % (len(PATTERNS), count))
+
+    tables = []
+    offset = 8
+    for group in range(count):
+        length = data[offset]
+        if length != PATTERN_LENGTHS[group]:
+            raise ValueError("Weight table %d has pattern length %d, expected %d"
+                             % (group, length, PATTERN_LENGTHS[group]))
+        offset += 1
+        tables.append(np.frombuffer(data, dtype='<i2', count=3 ** length, offset=offset).astype(np.int16))
+        offset += 2 * 3 ** length
+    return tables
+
+
+def save_weights(path, tables):
+    """
+    Writes weight tables in the format read by load_weights.
+    :param path: The file to write.
+    :param tables: List of arrays, one per pattern group.
+    """
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sHH', WEIGHTS_MAGIC, WEIGHTS_VERSION, len(tables)))
+        for length, table in zip(PATTERN_LENGTHS, tables):
+            f.write(struct.pack('<B', length))
+            f.write(np.asarray(table, dtype='<i2').tobytes())
+
+
+class PatternEvaluator(OthelloEvaluator):
+    """
+    Evaluator that scores a position by looking up board patterns in weight tables: the edges with their X squares,
+    3x3 and 2x5 corner regions, the inner rows and columns and the diagonals. Each placement of a pattern is encoded
+    as a base-3 number (0 empty, 1 white, 2 black for each square), which indexes the weight table of its group. The
+    score is the sum over all placements, positive when the position is good for white.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, weights_path=None):
+        """
+        :param weights_path: File with weight tables, see load_weights. Without one the default weights are used.
+        """
+        tables = load_weights(weights_path) if weights_path is not None else default_weights()
+        self.weights = np.concatenate(tables).astype(np.int64)
+
+    def evaluate(self, othello_position, timeout=None):
+        """
+        Evaluates a position.
+        :param othello_position: Position to evaluate.
+        :param timeout: Not used, the evaluation is a single step.
+        :return: The sum of the pattern weights.
+        """
+        return self.evaluate_batch([othello_position])[0]
+
+    def evaluate_batch(self, othello_positions):
+        """
+        Evaluates a list of positions at once.
+        :param othello_positions: Positions to evaluate.
+        :return: List of evaluations.
+        """
+        n = len(othello_positions)
+        markers = unpack_bitboards([p.white for p in othello_positions] + [p.black for p in othello_positions])
+        # State of every square, plus an always empty square 64 used as padding
+        states = np.zeros((n, 65), dtype=np.int64)
+        states[:, :64] = markers[:n] + 2 * markers[n:]
+
+        indexes = (states[:, PLACEMENT_SQUARES] * PLACEMENT_POWERS).sum(axis=2) + PLACEMENT_OFFSETS
+        return self.weights[indexes].sum(axis=1).tolist()
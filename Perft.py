@@ -0,0 +1,137 @@
+from OthelloPosition import OthelloPosition
+from OthelloAction import OthelloAction
+import sys
+import time
+
+# Leaf counts from the start position for depths 1-9, with passes counted as moves.
+START_PERFT = [1, 4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288]
+
+
+class Perft(object):
+    """
+    Counts the leaves of the full tree of legal moves from a position, to check move generation against known counts
+    and to measure how fast get_moves and making moves are.
+
+    A player without legal moves passes, which counts as a move, and a position where neither player can move is a
+    leaf at any depth.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, copy=False):
+        """
+        :param copy: True to make moves with make_move, which copies the position, instead of apply and undo.
+        """
+        self.copy = copy
+        self.moves = 0
+
+    def perft(self, othello_position, depth):
+        """
+        Counts the leaves of the tree of a position.
+        :param othello_position: The position, it is the same when the count is done.
+        :param depth: Number of moves to play out.
+        :return: The number of leaves.
+        """
+        if depth == 0:
+            return 1
+
+        mask, actions = othello_position.get_moves()
+        if not mask:
+            if self.__game_over(othello_position):
+                return 1
+            actions = [OthelloAction(0, 0, True)]
+
+        count = 0
+        for action in actions:
+            self.moves += 1
+            if self.copy:
+                count += self.perft(othello_position.make_move(action), depth - 1)
+            else:
+                othello_position.apply(action)
+                count += self.perft(othello_position, depth - 1)
+                othello_position.undo()
+        return count
+
+    def divide(self, othello_position, depth):
+        """
+        Counts the leaves below each move of a position, to find where two move generators differ.
+        :param othello_position: The position.
+        :param depth: Number of moves to play out, at least 1.
+        :return: List of (OthelloAction, leaves) pairs, one per legal move or a pass move.
+        """
+        mask, actions = othello_position.get_moves()
+        if not mask:
+            if self.__game_over(othello_position):
+                return []
+            actions = [OthelloAction(0, 0, True)]
+
+        counts = []
+        for action in actions:
+            self.moves += 1
+            othello_position.apply(action)
+            counts.append((action, self.perft(othello_position, depth - 1)))
+            othello_position.undo()
+        return counts
+
+    def __game_over(self, othello_position):
+        """
+        Check if the opponent cannot move either, in a position where the player to move has no legal move.
+        """
+        othello_position.apply(OthelloAction(0, 0, True))
+        over = othello_position.get_moves()[0] == 0
+        othello_position.undo()
+        return over
+
+
+def perft(othello_position, depth):
+    """
+    Counts the leaves of the tree of a position, see Perft.
+    :param othello_position: The position.
+    :param depth: Number of moves to play out.
+    :return: The number of leaves.
+    """
+    return Perft().perft(othello_position, depth)
+
+
+def main(argv):
+    """
+    Command line entry point: Perft.py [position string] depth [--divide] [--copy]. Prints the leaf count, the time
+    and the moves made per second. Without a position string the start position is used, and the count is checked
+    against the known values.
+    :param argv: The command line arguments, without the program name.
+    """
+    divide = "--divide" in argv
+    copy = "--copy" in argv
+    args = [arg for arg in argv if not arg.startswith("--")]
+    if not args:
+        print("Usage: Perft.py [position string] depth [--divide] [--copy]")
+        return
+
+    depth = int(args[-1])
+    if len(args) > 1:
+        position = OthelloPosition(args[0])
+    else:
+        position = OthelloPosition()
+        position.initialize()
+
+    counter = Perft(copy)
+    started = time.perf_counter()
+    if divide:
+        total = 0
+        for action, count in counter.divide(position, depth):
+            name = "pass" if action.is_pass_move else "(%d,%d)" % (action.row, action.col)
+            print("%s %d" % (name, count))
+            total += count
+    else:
+        total = counter.perft(position, depth)
+    elapsed = time.perf_counter() - started
+
+    print("perft(%d) = %d" % (depth, total))
+    print("%.3fs, %d moves, %.0f moves/s" % (elapsed, counter.moves, counter.moves / elapsed if elapsed > 0 else 0))
+    if len(args) == 1 and depth < len(START_PERFT) and total != START_PERFT[depth]:
+        print("MISMATCH: expected %d" % START_PERFT[depth])
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,65 @@
+import time
+
+# The clock is checked every this many nodes.
+CHECK_INTERVAL = 256
+
+
+class SearchTimeout(Exception):
+    """
+    Raised by SearchController.tick when the deadline has passed, to abort the search.
+    """
+    pass
+
+
+class SearchController(object):
+    """
+    Keeps track of the deadline of a search. The search calls tick once per node, and the clock is only read every
+    check_interval nodes, so checking the time costs almost nothing. When the deadline has passed tick raises
+    SearchTimeout, which unwinds the whole search. The caller catches it and falls back on the result of the last
+    completed iteration.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, deadline, check_interval=CHECK_INTERVAL):
+        """
+        :param deadline: Time (as given by time.time()) at which the search has to stop.
+        :param check_interval: Number of nodes between reading the clock.
+        """
+        self.deadline = deadline
+        self.check_interval = check_interval
+        self.remaining = check_interval
+        self.nodes = 0
+
+    def tick(self):
+        """
+        Counts a node, and every check_interval nodes checks the deadline.
+        :raises SearchTimeout: If the deadline has passed.
+        """
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.nodes += self.check_interval
+            self.remaining = self.check_interval
+            self.check()
+
+    def check(self):
+        """
+        Called by tick every check_interval nodes. A subclass can watch more than the deadline here, and abort the
+        search with an exception of its own.
+        :raises SearchTimeout: If the deadline has passed.
+        """
+        if time.time() >= self.deadline:
+            raise SearchTimeout()
+
+    def expired(self):
+        """
+        Check the deadline now.
+        :return: True if the deadline has passed.
+        """
+        return time.time() >= self.deadline
+
+    def node_count(self):
+        """
+        :return: The number of nodes counted so far.
+        """
+        return self.nodes + self.check_interval - self.remaining
@@ -0,0 +1,272 @@
+from OthelloPosition import OthelloPosition
+import json
+import time
+
+
+class InstrumentedPosition(OthelloPosition):
+    """
+    An OthelloPosition that adds the time spent in get_moves, apply and undo to a SearchStatistics. The search works
+    on one of these instead of the root position when statistics are collected, so the normal position class has no
+    timing code.
+    """
+
+    def __init__(self, othello_position, statistics):
+        """
+        :param othello_position: The position to copy, its undo stack is not copied.
+        :param statistics: The SearchStatistics to report to.
+        """
+        OthelloPosition.__init__(self, "")
+        self.white = othello_position.white
+        self.black = othello_position.black
+        self.maxPlayer = othello_position.maxPlayer
+        self.hash = othello_position.hash
+        self.track_weights(othello_position.weights)
+        self.statistics = statistics
+
+    def get_moves(self):
+        started = time.perf_counter()
+        result = OthelloPosition.get_moves(self)
+        self.statistics.move_generation_time += time.perf_counter() - started
+        return result
+
+    def apply(self, action):
+        started = time.perf_counter()
+        OthelloPosition.apply(self, action)
+        self.statistics.make_move_time += time.perf_counter() - started
+
+    def undo(self):
+        started = time.perf_counter()
+        OthelloPosition.undo(self)
+        self.statistics.make_move_time += time.perf_counter() - started
+
+
+class SearchStatistics(object):
+    """
+    Collects statistics of the searches of a game: for every iteration the nodes visited, leaves evaluated, beta
+    cutoffs and how many of them the first move searched caused, transposition table and evaluation cache hit rates,
+    the time spent generating moves, making moves and evaluating, the effective branching factor and the nodes per
+    second. For the whole search the aspiration re-searches and the cutoff counts of the move ordering (the counts
+    of MoveOrderer.statistics) are added.
+
+    Every search gives one record, a dict that can be written as a JSON line. The records are kept in records and
+    written to output if one is given. A field that was not measured is None: a hit rate without any lookups, or a
+    time the workers do not report.
+
+    Iterations searched on worker processes (game.set_parallel) are counted by the workers, which report their totals
+    with add_worker_counts. Their get_moves and apply/undo times are not measured, and the evaluation time is the sum
+    over the workers, so it can be more than the time of the iteration. Lazy SMP workers (game.set_lazy_smp) keep
+    records of their own, and their iterations are added to the record of the search with add_worker_search.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, output=None):
+        """
+        :param output: A text stream the records are written to as JSON lines, or None.
+        """
+        self.output = output
+        self.records = []
+        self.record = None
+        self.__reset_counters()
+
+    def __reset_counters(self):
+        """
+        Zeroes the counters of an iteration.
+        """
+        self.leaves = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.worker_nodes = 0
+        self.worker_probes = 0
+        self.worker_hits = 0
+        self.worker_counts = False
+        self.move_generation_time = 0.0
+        self.make_move_time = 0.0
+        self.evaluation_time = 0.0
+
+    def instrument(self, othello_position):
+        """
+        :param othello_position: The root position of a search.
+        :return: A copy of the position that reports its time to these statistics.
+        """
+        return InstrumentedPosition(othello_position, self)
+
+    def timed_evaluator(self, evaluate):
+        """
+        Wraps an evaluation function so its calls are counted and timed.
+        :param evaluate: The evaluate method of an evaluator.
+        :return: A function with the same arguments.
+        """
+        def timed(othello_position, timeout=None):
+            started = time.perf_counter()
+            value = evaluate(othello_position, timeout)
+            self.evaluation_time += time.perf_counter() - started
+            self.leaves += 1
+            return value
+        return timed
+
+    def timed_batch_evaluator(self, evaluate_batch):
+        """
+        Wraps a batch evaluation function so its positions are counted and its calls timed.
+        :param evaluate_batch: The evaluate_batch method of an evaluator.
+        :return: A function with the same arguments.
+        """
+        def timed(othello_positions):
+            started = time.perf_counter()
+            values = evaluate_batch(othello_positions)
+            self.evaluation_time += time.perf_counter() - started
+            self.leaves += len(othello_positions)
+            return values
+        return timed
+
+    def add_worker_counts(self, nodes, leaves, cutoffs, first_move_cutoffs, evaluation_time, probes, hits):
+        """
+        Adds the counts of a search made by a worker process to the running iteration.
+        :param nodes: Nodes visited.
+        :param leaves: Leaves evaluated.
+        :param cutoffs: Beta cutoffs.
+        :param first_move_cutoffs: Beta cutoffs caused by the first move searched.
+        :param evaluation_time: Time spent evaluating, in seconds.
+        :param probes: Lookups in the transposition table of the worker.
+        :param hits: Lookups that found the position.
+        """
+        self.worker_nodes += nodes
+        self.leaves += leaves
+        self.cutoffs += cutoffs
+        self.first_move_cutoffs += first_move_cutoffs
+        self.evaluation_time += evaluation_time
+        self.worker_probes += probes
+        self.worker_hits += hits
+        self.worker_counts = True
+
+    def add_worker_search(self, worker, record):
+        """
+        Adds the iterations of a Lazy SMP worker to the record of the search. They ran at the same time as those of
+        the other workers, so the nodes of the search are the work of all of them.
+        :param worker: Number of the worker.
+        :param record: The record of the search of the worker, see end_search.
+        """
+        for iteration in record['iterations']:
+            iteration['worker'] = worker
+            self.record['iterations'].append(iteration)
+        self.record['aspiration_researches'] = self.record.get('aspiration_researches', 0) \
+            + record['aspiration_researches']
+
+    def begin_search(self, othello_position, timeout):
+        """
+        Starts the record of a search.
+        :param othello_position: The root position.
+        :param timeout: The deadline of the search.
+        """
+        self.__reset_counters()
+        self.started = time.time()
+        self.record = {
+            'white': othello_position.white,
+            'black': othello_position.black,
+            'white_to_move': othello_position.to_move(),
+            'time_limit': timeout - self.started,
+            'iterations': [],
+        }
+
+    def begin_iteration(self, depth, controller, table, caches):
+        """
+        Starts counting an iteration.
+        :param depth: The search depth of the iteration.
+        :param controller: The SearchController of the search, it counts the nodes.
+        :param table: The transposition table, or None.
+        :param caches: The CachedEvaluators used, if any.
+        """
+        self.__reset_counters()
+        self.depth = depth
+        self.iteration_started = time.time()
+        self.nodes_before = controller.node_count()
+        self.table_before = (table.probes, table.hits) if table is not None else (0, 0)
+        self.caches_before = [(cache.hits, cache.misses) for cache in caches]
+
+    def end_iteration(self, completed, action, controller, table, caches):
+        """
+        Adds the statistics of an iteration to the record.
+        :param completed: False if the iteration was aborted at the deadline.
+        :param action: The best move of the iteration, or None if it was aborted.
+        :param controller: The SearchController of the search.
+        :param table: The transposition table, or None.
+        :param caches: The CachedEvaluators used, if any.
+        """
+        elapsed = time.time() - self.iteration_started
+        nodes = controller.node_count() - self.nodes_before + self.worker_nodes
+
+        probes, hits = (table.probes, table.hits) if table is not None else (0, 0)
+        probes += self.worker_probes - self.table_before[0]
+        hits += self.worker_hits - self.table_before[1]
+        cache_hits = sum(cache.hits for cache in caches) - sum(before[0] for before in self.caches_before)
+        cache_misses = sum(cache.misses for cache in caches) - sum(before[1] for before in self.caches_before)
+
+        iterations = self.record['iterations']
+        previous = iterations[-1]['nodes'] if iterations else 0
+        iteration = {
+            'depth': self.depth,
+            'completed': completed,
+            'nodes': nodes,
+            'leaves': self.leaves,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'tt_hit_rate': hits / probes if probes else None,
+            'eval_cache_hit_rate': cache_hits / (cache_hits + cache_misses) if cache_hits + cache_misses else None,
+            'move_generation_time': None if self.worker_counts else self.move_generation_time,
+            'make_move_time': None if self.worker_counts else self.make_move_time,
+            'evaluation_time': self.evaluation_time,
+            'time': elapsed,
+            'branching_factor': nodes / previous if previous else 0.0,
+            'nps': nodes / elapsed if elapsed > 0 else 0.0,
+        }
+        if action is not None:
+            iteration['move'] = [action.row, action.col, action.is_pass_move]
+            iteration['value'] = action.value
+        iterations.append(iteration)
+
+    def end_search(self, action, completed_depth, method="search", aspiration_researches=None):
+        """
+        Completes the record of a search, keeps it and writes it to the output.
+        :param action: The move returned by the search.
+        :param completed_depth: The deepest completed iteration.
+        :param method: How the move was found: search, endgame (the endgame solver), book (the opening book) or
+        lazy_smp (worker processes, whose iterations are recorded with the number of the worker).
+        :param aspiration_researches: Searches of the root repeated with a wider aspiration window, None if the
+        move was not searched here. The Lazy SMP workers report theirs with add_worker_search.
+        :return: The record.
+        """
+        record = self.record
+        elapsed = time.time() - self.started
+        iterations = record['iterations']
+        nodes = sum(iteration['nodes'] for iteration in iterations)
+        cutoffs = sum(iteration['cutoffs'] for iteration in iterations)
+        first_move_cutoffs = sum(iteration['first_move_cutoffs'] for iteration in iterations)
+        record.setdefault('aspiration_researches', aspiration_researches)
+        record.update({
+            'method': method,
+            'move': [action.row, action.col, action.is_pass_move],
+            'value': action.value,
+            'depth': completed_depth,
+            'nodes': nodes,
+            'time': elapsed,
+            'nps': nodes / elapsed if elapsed > 0 else 0.0,
+            # The branching factor that gives the node count of the deepest completed iteration
+            'branching_factor': self.__effective_branching(iterations, completed_depth),
+            'move_ordering': {'cutoffs': cutoffs, 'first_move_cutoffs': first_move_cutoffs,
+                              'first_move_cutoff_rate': first_move_cutoffs / cutoffs if cutoffs else None},
+        })
+        self.records.append(record)
+        self.record = None
+        if self.output is not None:
+            self.output.write(json.dumps(record) + "\n")
+            self.output.flush()
+        return record
+
+    def __effective_branching(self, iterations, depth):
+        """
+        :return: nodes ** (1 / depth) of the iteration searched to depth, 0 if there is none.
+        """
+        for iteration in iterations:
+            if iteration['depth'] == depth and iteration['completed'] and iteration['nodes'] > 0:
+                return iteration['nodes'] ** (1.0 / depth)
+        return 0.0
@@ -1,16 +1,41 @@
-from OthelloEvaluator import OthelloEvaluator
-import time
+from OthelloEvaluator import WeightedEvaluator
+from MoveHandler import countBits, CENTER
+import numpy as np
 
 
-class SuperSmartEvaluator(OthelloEvaluator):
+class SuperSmartEvaluator(WeightedEvaluator):
     """
     Class to represent a evaluator used by a Minimax algorithm. 
 
     Author: dv18mln
     """
-    
 
-    def evaluate(self, othello_position, timeout):
+    # Weight of each tile, see combine. The border is never used.
+    tile_score = [
+        [0,   0,   0,   0,   0,   0,   0,   0,   0,   0],
+        [0, 120, -20,  20,   5,   5,  20, -20, 120,   0],
+        [0, -20, -40,  -5,  -5,  -5,  -5, -40, -20,   0],
+        [0,  20,  -5,   5,   3,   3,   5,  -5,  20,   0],
+        [0,   5,  -5,   3,   3,   3,   3,  -5,   5,   0],
+        [0,   5,  -5,   3,   3,   3,   3,  -5,   5,   0],
+        [0,  20,  -5,   5,   3,   3,   5,  -5,  20,   0],
+        [0, -20, -40,  -5,  -5,  -5,  -5, -40, -20,   0],
+        [0, 120, -20,  20,   5,   5,  20, -20, 120,   0],
+        [0,   0,   0,   0,   0,   0,   0,   0,   0,   0]
+    ]
+
+    def tracked_counts(self, othello_position):
+        """
+        The tracked sums, with the black markers in the center counted
+        from the bitboard. The white ones are not used.
+        :param othello_position: A position keeping the sums of WEIGHTS.
+        :return: A tuple (white, black) of sums, see combine.
+        """
+        return ((othello_position.white_sum, othello_position.white_count, 0),
+                (othello_position.black_sum, othello_position.black_count,
+                 countBits(othello_position.black & CENTER)))
+
+    def combine(self, W, B):
         """
         The rules and strategies to play the game it taken from this website:
         https://www.ultraboardgames.com/othello/tips.php
@@ -50,88 +75,50 @@ class SuperSmartEvaluator(OthelloEvaluator):
         This function is used in a later part of the game, 
         when the inner 4x4 matrix is full.
 
-        :param othello_position: Position to evaluate.
-        :param timeout: Set timeout for the algortihm to exit.
+        The tile weights and the bonus for staying in the center are
+        combined into one weight per square (see FEATURES), so the
+        whole board is scored with a single matrix product, or from
+        the sums kept by the position (see WeightedEvaluator).
+
+        :param W: Sums of the white markers: positional score, markers
+        and markers in the center.
+        :param B: The same sums of the black markers.
+        :return: A tuple (W_score, B_score).
         """
+        W_markers = W[1]
+        B_markers = B[1]
+
+        # Every center square without a black marker costs both players 5,
+        # and squares without a black marker are counted as empty.
+        open_center = 5 * (16 - B[2])
+        E = 64 - B_markers
+
+        # Fewer than 15 empty: more markers is better, before that fewer is better
+        sign = 2 * (E < 15) - 1
+        W_score = W[0] - open_center + sign * W_markers + 2 * W_markers * (W_markers <= 3)
+        B_score = B[0] - open_center + sign * B_markers + 2 * B_markers * (B_markers <= 3)
+        return W_score, B_score
+
+
+def __center_bonus(i):
+    """
+    Bonus for staying in the center, for row or column i.
+    """
+    if i > 4:
+        return 8 - i
+    if i < 4:
+        return i
+    return 0
+
+
+# Columns: tile weight plus center bonus, 1 to count markers, 1 for the inner 4x4 squares.
+FEATURES = np.array([
+    [SuperSmartEvaluator.tile_score[i][j] + __center_bonus(i) + __center_bonus(j), 1, int(3 <= i <= 6 and 3 <= j <= 6)]
+    for i in range(1, 9) for j in range(1, 9)
+])
+
+# The tile weights plus center bonus as a list, the weight table tracked by incremental positions.
+WEIGHTS = FEATURES[:, 0].tolist()
 
-        tile_score = [
-            [0,   0,   0,   0,   0,   0,   0,   0,   0,   0],
-            [0, 120, -20,  20,   5,   5,  20, -20, 120,   0],
-            [0, -20, -40,  -5,  -5,  -5,  -5, -40, -20,   0],
-            [0,  20,  -5,   5,   3,   3,   5,  -5,  20,   0],
-            [0,   5,  -5,   3,   3,   3,   3,  -5,   5,   0],
-            [0,   5,  -5,   3,   3,   3,   3,  -5,   5,   0],
-            [0,  20,  -5,   5,   3,   3,   5,  -5,  20,   0],
-            [0, -20, -40,  -5,  -5,  -5,  -5, -40, -20,   0],
-            [0, 120, -20,  20,   5,   5,  20, -20, 120,   0],
-            [0,   0,   0,   0,   0,   0,   0,   0,   0,   0]
-        ]
-
-        B_score = 0
-        B_markers = 0
-        W_score = 0
-        W_markers = 0
-        E = 0
-
-        for i in range(1,9):
-            if time.time() >= timeout:
-                return None
-            for j in range(1,9):
-                
-                # Aim for corners
-                if othello_position.board[i][j] == 'W':
-                    
-                    W_score += tile_score[i][j]
-                   
-                    if i > 4:
-                        W_score += (8 - i)
-                    if i < 4:
-                        W_score += i
-                    if j > 4:
-                        W_score += (8 - j)
-                    if j < 4:
-                        W_score += j
-                            
-                    W_markers += 1
-
-                if othello_position.board[i][j] == 'B':
-                    
-                    B_score += tile_score[i][j]
-                    
-                    if i > 4:
-                        B_score += (8 - i)
-                    if i < 4:
-                        B_score += i
-                    if j > 4:
-                        B_score += (8 - j)
-                    if j < 4:
-                        B_score += j
-
-                    B_markers += 1
-
-                else:
-                    
-                    if i >= 3 and i <= 6 and j >= 3 and j <= 6:
-                        W_score -= 5
-                        B_score -= 5
-
-                    E += 1
-
-        if E < 15:
-                W_score += W_markers
-                B_score += B_markers
-        else: 
-            W_score -= W_markers
-            B_score -= B_markers
-
-        if W_markers <= 3:
-            W_score += 2 * W_markers
-        if B_markers <= 3:
-            B_score += 2 * B_markers
-
-        # Max - Min
-        if othello_position.to_move():
-            return W_score
-        else:
-            return -B_score
-        
+SuperSmartEvaluator.FEATURES = FEATURES
+SuperSmartEvaluator.WEIGHTS = WEIGHTS
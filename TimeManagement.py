@@ -0,0 +1,130 @@
+import time
+
+# Iterations faster than this are too noisy to estimate the branching factor from.
+MIN_ITERATION_TIME = 0.001
+
+# Branching factor assumed until two iterations have been timed.
+DEFAULT_BRANCHING = 4.0
+
+
+class TimeManager(object):
+    """
+    Decides when the iterative deepening in game.evaluate should stop, so time is not spent on an iteration that
+    cannot finish before the deadline and would be thrown away.
+
+    The cost of the next iteration is predicted from the time of the last one and the effective branching factor, the
+    growth in time from one depth to the next. The evaluation of the search swings between odd and even depths, so
+    the factor is estimated over the last two iterations when there are enough of them.
+
+    When the transposition table is warm from the search of an earlier move, the first iterations are answered from it
+    almost at once. Their times say nothing about the first depth that has to be searched for real, so the manager
+    keeps the time each depth took in earlier searches and predicts from that instead, see predicted_time.
+
+    A search aims to stop after a soft limit, a part of the time it has. If the best move changed in the last
+    iteration the position is unclear, and the soft limit is extended so the search can settle. The deadline given to
+    the search is never passed.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, soft_fraction=0.7, extension=1.5):
+        """
+        :param soft_fraction: Part of the available time after which no new iteration is started.
+        :param extension: Factor the soft limit grows by (counted from the start) each time the best move changes.
+        """
+        self.soft_fraction = soft_fraction
+        self.extension = extension
+        # Time of the last iteration at each depth that took long enough to time, from this and earlier searches
+        self.depth_times = {}
+        self.last_branching = DEFAULT_BRANCHING
+        self.start(time.time())
+
+    def start(self, deadline):
+        """
+        Starts timing a new search.
+        :param deadline: Time at which the search has to stop.
+        """
+        self.started = time.time()
+        self.deadline = deadline
+        self.soft_limit = self.started + self.soft_fraction * (deadline - self.started)
+        self.iteration_started = self.started
+        self.times = []
+        self.depth = 0
+        self.best_move = None
+        self.extensions = 0
+
+    def iteration_done(self, action, depth=None):
+        """
+        Records a completed iteration.
+        :param action: The best move found by the iteration.
+        :param depth: The depth of the iteration, None if not known. The times of earlier searches are only used
+        when it is given.
+        """
+        now = time.time()
+        elapsed = now - self.iteration_started
+        self.times.append(elapsed)
+        self.iteration_started = now
+        if depth is not None:
+            self.depth = depth
+            if elapsed >= MIN_ITERATION_TIME:
+                self.depth_times[depth] = elapsed
+        if self.__measured():
+            self.last_branching = self.branching_factor()
+
+        move = (action.row, action.col, action.is_pass_move)
+        if self.best_move is not None and move != self.best_move:
+            allowed = (self.soft_limit - self.started) * self.extension
+            self.soft_limit = min(self.started + allowed, self.deadline)
+            self.extensions += 1
+        self.best_move = move
+
+    def __measured(self):
+        """
+        :return: True if the last two iterations took long enough to estimate the branching factor from.
+        """
+        times = self.times
+        return len(times) >= 2 and times[-2] >= MIN_ITERATION_TIME and times[-1] >= MIN_ITERATION_TIME
+
+    def branching_factor(self):
+        """
+        Estimates the effective branching factor from the iteration times.
+        :return: The expected ratio between the time of the next iteration and the last one. The last estimate of an
+        earlier search if the iterations of this one were too fast to time.
+        """
+        times = self.times
+        if len(times) >= 3 and times[-3] >= MIN_ITERATION_TIME and times[-1] >= MIN_ITERATION_TIME:
+            return (times[-1] / times[-3]) ** 0.5
+        if self.__measured():
+            return times[-1] / times[-2]
+        return self.last_branching
+
+    def predicted_time(self):
+        """
+        Predicts the time of the next iteration. If the last iteration was too fast to time, it was answered from the
+        transposition table, and the next depth is predicted from the time the deepest depth up to it took in an
+        earlier search. The first depth searched for real has been seen to take up to twice as long as the same depth
+        in the search before, so that time is scaled by the square root of the branching factor.
+        :return: Predicted time of the next iteration in seconds.
+        """
+        if not self.times:
+            return 0.0
+        branching = max(self.branching_factor(), 1.0)
+        if self.times[-1] >= MIN_ITERATION_TIME:
+            return self.times[-1] * branching
+        depth = self.depth + 1
+        known = [known_depth for known_depth in self.depth_times if known_depth <= depth]
+        if not known:
+            return self.times[-1] * branching
+        known_depth = max(known)
+        return self.depth_times[known_depth] * branching ** (depth - known_depth + 0.5)
+
+    def should_continue(self):
+        """
+        Check if the next iteration should be started.
+        :return: False if the soft limit has passed or the next iteration is not expected to finish before the
+        deadline.
+        """
+        now = time.time()
+        if not self.times:
+            return now < self.deadline
+        return now < self.soft_limit and now + self.predicted_time() < self.deadline
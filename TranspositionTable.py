@@ -0,0 +1,150 @@
+from multiprocessing import shared_memory
+
+LOWER = 1
+UPPER = 2
+EXACT = LOWER | UPPER
+
+NO_MOVE = 255
+
+
+class TranspositionTable(object):
+    """
+    A fixed size hash table of search results, keyed by the Zobrist hash of a position. Every entry holds the depth
+    that was searched, the kind of bound (exact, lower or upper), the score and the best move found.
+
+    The table is split into buckets of two entries. The first entry is depth-preferred: it is only replaced by a search
+    at least as deep, or when it was stored during an earlier search. The second entry is always replaced, so recent
+    results are kept as well.
+
+    An entry is two 64-bit words, the key and the packed data:
+    bits 0-31 score (offset by 2^31), bits 32-39 depth, bits 40-47 move, bits 48-49 bound type, bits 56-63 generation.
+    The key word holds the key xor the data, so an entry that was half written by another process sharing the table
+    (see SharedTranspositionTable) does not match any key.
+
+    Author: dv18mln
+    """
+
+    ENTRY_BYTES = 16
+
+    def __init__(self, size_mb=16, buffer=None):
+        """
+        Allocates the table.
+        :param size_mb: Memory budget in MB. The number of buckets is rounded down to a power of two.
+        :param buffer: Memory to keep the entries in, at least table_bytes(size_mb) bytes. A new zeroed buffer is
+        allocated if not given.
+        """
+        buckets = self.table_bytes(size_mb) // (2 * self.ENTRY_BYTES)
+        self.mask = buckets - 1
+        self.size = 2 * buckets
+        if buffer is None:
+            buffer = bytearray(self.size * self.ENTRY_BYTES)
+        words = memoryview(buffer)[:self.size * self.ENTRY_BYTES].cast('Q')
+        self.keys = words[:self.size]
+        self.data = words[self.size:]
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    @classmethod
+    def table_bytes(cls, size_mb):
+        """
+        The memory used by a table.
+        :param size_mb: Memory budget in MB.
+        :return: Size of the entries in bytes.
+        """
+        buckets = 1
+        while buckets * 4 * cls.ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        return buckets * 2 * cls.ENTRY_BYTES
+
+    def new_search(self):
+        """
+        Marks the start of a new search. Entries from earlier searches are still used, but are replaced first.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        zeros = memoryview(bytes(self.size * 8)).cast('Q')
+        self.keys[:] = zeros
+        self.data[:] = zeros
+
+    def probe(self, key):
+        """
+        Looks up a position.
+        :param key: Zobrist hash of the position.
+        :return: A tuple (depth, bound, score, move) or None if the position is not in the table.
+        The move is a square index (row - 1) * 8 + (col - 1), or NO_MOVE.
+        """
+        self.probes += 1
+        i = (key & self.mask) << 1
+        data = self.data[i]
+        if self.keys[i] ^ data != key:
+            i += 1
+            data = self.data[i]
+            if self.keys[i] ^ data != key:
+                return None
+        if not data:
+            return None
+        self.hits += 1
+        return ((data >> 32) & 0xFF, (data >> 48) & 0x3, (data & 0xFFFFFFFF) - 0x80000000, (data >> 40) & 0xFF)
+
+    def store(self, key, depth, bound, score, move=NO_MOVE):
+        """
+        Stores a search result.
+        :param key: Zobrist hash of the position.
+        :param depth: Remaining depth that was searched from the position.
+        :param bound: EXACT, LOWER or UPPER.
+        :param score: The score.
+        :param move: Best move as a square index, or NO_MOVE.
+        """
+        i = (key & self.mask) << 1
+        old = self.data[i]
+        if self.keys[i] ^ old != key and depth < ((old >> 32) & 0xFF) and old >> 56 == self.generation:
+            i += 1
+        data = ((score + 0x80000000) & 0xFFFFFFFF) | (depth << 32) | (move << 40) | (bound << 48) \
+            | (self.generation << 56)
+        self.keys[i] = key ^ data
+        self.data[i] = data
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    A transposition table in shared memory, so several processes can search with the same table. Writes are not
+    locked: a process may read an entry another one is writing, but then the key check fails and it is treated as a
+    miss.
+
+    The process creating the table owns the memory and has to call unlink when the table is no longer used, the
+    others attach to it by name.
+
+    Author: dv18mln
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        """
+        Creates a new shared table, or attaches to an existing one.
+        :param size_mb: Memory budget in MB, the same in every process using the table.
+        :param name: Name of the shared memory of an existing table, None to create a new one.
+        """
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=self.table_bytes(size_mb))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+        TranspositionTable.__init__(self, size_mb, self.memory.buf)
+
+    def close(self):
+        """
+        Detaches this process from the table.
+        """
+        self.keys.release()
+        self.data.release()
+        self.memory.close()
+
+    def unlink(self):
+        """
+        Frees the shared memory, called by the process that created the table.
+        """
+        self.memory.unlink()
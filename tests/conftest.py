@@ -0,0 +1,40 @@
+from OthelloPosition import OthelloPosition
+from OthelloAction import OthelloAction
+import random
+import pytest
+
+
+def play_random_game(rng):
+    """
+    Plays a game with random moves from the start position.
+    :param rng: A random.Random.
+    :return: List of the position strings of the game, the start position first and the final position last.
+    """
+    position = OthelloPosition()
+    position.initialize()
+    positions = [position.to_string()]
+    while True:
+        mask, actions = position.get_moves()
+        if mask:
+            action = rng.choice(list(actions))
+        else:
+            position.apply(OthelloAction(0, 0, True))
+            over = not position.get_moves()[0]
+            position.undo()
+            if over:
+                return positions
+            action = OthelloAction(0, 0, True)
+        position.apply(action)
+        positions.append(position.to_string())
+
+
+@pytest.fixture(scope="session")
+def game_positions():
+    """
+    Every position of 40 random games, about 2400 positions from all parts of the game and with some passes.
+    """
+    rng = random.Random(1)
+    positions = []
+    for game in range(40):
+        positions.extend(play_random_game(rng))
+    return positions
@@ -0,0 +1,88 @@
+from OthelloPosition import OthelloPosition
+from OthelloAction import OthelloAction
+from conftest import play_random_game
+import random
+
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def reference_flips(position_str, row, col):
+    """
+    The markers flipped by a move, found by walking the board square by square.
+    :return: List of (row, col), empty if the move is not legal.
+    """
+    own, opp = ('O', 'X') if position_str[0] == 'W' else ('X', 'O')
+    board = position_str[1:]
+    if board[(row - 1) * 8 + col - 1] != 'E':
+        return []
+    flips = []
+    for dr, dc in DIRECTIONS:
+        r, c = row + dr, col + dc
+        line = []
+        while 1 <= r <= 8 and 1 <= c <= 8 and board[(r - 1) * 8 + c - 1] == opp:
+            line.append((r, c))
+            r, c = r + dr, c + dc
+        if line and 1 <= r <= 8 and 1 <= c <= 8 and board[(r - 1) * 8 + c - 1] == own:
+            flips.extend(line)
+    return flips
+
+
+def reference_move(position_str, row, col):
+    """
+    The position string after a legal move, see reference_flips.
+    """
+    own = 'O' if position_str[0] == 'W' else 'X'
+    board = list(position_str[1:])
+    for r, c in reference_flips(position_str, row, col) + [(row, col)]:
+        board[(r - 1) * 8 + c - 1] = own
+    return ('B' if position_str[0] == 'W' else 'W') + ''.join(board)
+
+
+def test_moves_match_reference(game_positions):
+    for position_str in game_positions:
+        mask, actions = OthelloPosition(position_str).get_moves()
+        moves = [(action.row, action.col) for action in actions]
+        expected = [(row, col) for row in range(1, 9) for col in range(1, 9)
+                    if reference_flips(position_str, row, col)]
+        assert moves == expected, position_str
+        assert bin(mask).count('1') == len(moves)
+
+
+def test_make_move_matches_reference(game_positions):
+    for position_str in game_positions[::5]:
+        position = OthelloPosition(position_str)
+        for action in position.get_moves()[1]:
+            after = position.make_move(action)
+            assert after.to_string() == reference_move(position_str, action.row, action.col)
+            assert after.hash == after.compute_hash()
+        assert position.to_string() == position_str
+
+
+def test_apply_and_undo_restore_the_position():
+    rng = random.Random(5)
+    for game in range(20):
+        position = OthelloPosition()
+        position.initialize()
+        states = []
+        for position_str in play_random_game(rng)[1:]:
+            states.append((position.to_string(), position.hash, position.white_count, position.black_count))
+            # Replay the game with apply, passes included
+            mask, actions = position.get_moves()
+            action = OthelloAction(0, 0, True)
+            for candidate in actions:
+                if position.make_move(candidate).to_string() == position_str:
+                    action = candidate
+            position.apply(action)
+            assert position.to_string() == position_str
+            assert position.hash == position.compute_hash()
+        while states:
+            position.undo()
+            assert (position.to_string(), position.hash, position.white_count, position.black_count) == states.pop()
+
+
+def test_hash_includes_side_to_move():
+    position = OthelloPosition()
+    position.initialize()
+    other = OthelloPosition('B' + position.to_string()[1:])
+    assert position.hash != other.hash
+    assert OthelloPosition(position.to_string()).hash == position.hash
@@ -0,0 +1,51 @@
+from OthelloPosition import OthelloPosition
+from OthelloAction import OthelloAction
+from EndgameSolver import EndgameSolver, EndgameTimeout
+from MoveHandler import countBits
+import random
+import time
+import pytest
+
+
+def negamax(position, passed=False):
+    """
+    Plays out every line to the end of the game with the position's own move generation.
+    :return: Final disc differential (empty squares to the winner) for the player to move.
+    """
+    mask, actions = position.get_moves()
+    if not mask:
+        if passed:
+            diff = countBits(position.white) - countBits(position.black)
+            empties = 64 - countBits(position.white | position.black)
+            diff = diff + empties if diff > 0 else diff - empties if diff < 0 else 0
+            return diff if position.to_move() else -diff
+        position.apply(OthelloAction(0, 0, True))
+        value = -negamax(position, True)
+        position.undo()
+        return value
+    best = -65
+    for action in actions:
+        position.apply(action)
+        best = max(best, -negamax(position))
+        position.undo()
+    return best
+
+
+def test_solver_matches_negamax(game_positions):
+    candidates = [position_str for position_str in game_positions if 3 <= position_str.count('E') <= 8]
+    for position_str in random.Random(2).sample(candidates, 150):
+        position = OthelloPosition(position_str)
+        action = EndgameSolver().solve(position, float('inf'))
+        value = negamax(position)
+        assert action.value == (value if position.to_move() else -value), position_str
+        if not action.is_pass_move:
+            assert -negamax(position.make_move(action)) == value, position_str
+
+
+def test_solver_stops_at_the_deadline(game_positions):
+    position_str = next(position_str for position_str in game_positions if position_str.count('E') == 12
+                        and OthelloPosition(position_str).get_moves()[0])
+    started = time.time()
+    with pytest.raises(EndgameTimeout):
+        EndgameSolver().solve(OthelloPosition(position_str), started + 0.005)
+    assert time.time() - started < 0.03
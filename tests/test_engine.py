@@ -0,0 +1,77 @@
+from Engine import Engine, serve, format_action
+from conftest import play_random_game
+from OthelloPosition import OthelloPosition
+from SearchStatistics import SearchStatistics
+import io
+import random
+import pytest
+
+
+def test_reused_engine_does_not_start_iterations_it_cannot_finish():
+    statistics = SearchStatistics()
+    engine = Engine(statistics=statistics)
+    position = OthelloPosition()
+    position.initialize()
+    for move in range(20):
+        result = engine.search(position.clone(), 0.2)
+        position.apply(result.action)
+    engine.close()
+
+    total = sum(record['time'] for record in statistics.records)
+    aborted = [iteration for record in statistics.records for iteration in record['iterations']
+               if not iteration['completed']]
+    # With a warm transposition table the iterations up to the depth of the last search take no time, the time
+    # manager has to predict the next one from earlier searches
+    assert len(aborted) <= 5
+    assert sum(iteration['time'] for iteration in aborted) < 0.3 * total
+
+
+def test_table_is_cleared_when_the_phase_changes():
+    engine = Engine()
+    table = engine.game.table
+    engine.game.set_phase(True)
+    table.store(12345, 3, 3, 17)
+    engine.game.set_phase(True)
+    assert table.probe(12345) == (3, 3, 17, 255)
+    # Early and late game scores are on different scales
+    engine.game.set_phase(False)
+    assert table.probe(12345) is None
+    engine.close()
+
+
+@pytest.mark.parametrize("lazy_smp", [False, True])
+def test_worker_searches_are_recorded(lazy_smp):
+    statistics = SearchStatistics()
+    engine = Engine(workers=2, lazy_smp=lazy_smp, statistics=statistics)
+    position = OthelloPosition()
+    position.initialize()
+    engine.search(position, 0.3)
+    engine.close()
+
+    record = statistics.records[-1]
+    assert record['method'] == ("lazy_smp" if lazy_smp else "search")
+    assert record['nodes'] > 0 and record['nps'] > 0
+    assert record['iterations'] and all(iteration['nodes'] > 0 for iteration in record['iterations'])
+    # The tables of the workers are the ones probed, the shallowest iterations may not probe at all
+    assert all(iteration['tt_hit_rate'] is not None for iteration in record['iterations'] if iteration['depth'] > 2)
+    assert record['aspiration_researches'] is not None
+    assert record['move_ordering']['first_move_cutoff_rate'] is not None
+
+
+def test_server_plays_a_game():
+    positions = play_random_game(random.Random(3))[:12]
+    requests = [position_str + " 0.1\n" for position_str in positions] + ["WEEE 0.1\n", "quit\n", positions[0] + " 1\n"]
+    output = io.StringIO()
+    engine = Engine(eval_cache=1 << 16)
+    serve(engine, io.StringIO("".join(requests)), output)
+
+    answers = output.getvalue().splitlines()
+    assert len(answers) == len(positions) + 1
+    for position_str, answer in zip(positions, answers):
+        actions = OthelloPosition(position_str).get_moves()[1]
+        assert answer in [format_action(action) for action in actions] or not actions and answer == "pass"
+    assert answers[-1].startswith("error")
+    # The caches are kept from one request to the next
+    early = engine.game.early_evaluator
+    assert early.hits > 0 and len(early.cache) > 0
+    engine.close()
@@ -0,0 +1,95 @@
+from OthelloPosition import OthelloPosition
+from SuperSmartEvaluator import SuperSmartEvaluator
+from EarlyGameEvaluator import EarlyGameEvalutor
+
+
+def reference_super_smart(position_str):
+    """
+    SuperSmartEvaluator written out square by square, as it was before it was vectorized.
+    """
+    tile_score = SuperSmartEvaluator.tile_score
+    W_score = B_score = W_markers = B_markers = E = 0
+    for i in range(1, 9):
+        for j in range(1, 9):
+            square = position_str[(i - 1) * 8 + j]
+            bonus = tile_score[i][j] + (8 - i if i > 4 else i if i < 4 else 0) + (8 - j if j > 4 else j if j < 4 else 0)
+            if square == 'O':
+                W_score += bonus
+                W_markers += 1
+            if square == 'X':
+                B_score += bonus
+                B_markers += 1
+            else:
+                # Every square without a black marker counts as open
+                if 3 <= i <= 6 and 3 <= j <= 6:
+                    W_score -= 5
+                    B_score -= 5
+                E += 1
+    if E < 15:
+        W_score += W_markers
+        B_score += B_markers
+    else:
+        W_score -= W_markers
+        B_score -= B_markers
+    if W_markers <= 3:
+        W_score += 2 * W_markers
+    if B_markers <= 3:
+        B_score += 2 * B_markers
+    return W_score if position_str[0] == 'W' else -B_score
+
+
+def reference_early_game(position_str):
+    """
+    EarlyGameEvalutor written out square by square, as it was before it was vectorized.
+    """
+    tile_score = EarlyGameEvalutor.tile_score
+    W_score = B_score = W_markers = B_markers = 0
+    for i in range(1, 9):
+        for j in range(1, 9):
+            square = position_str[(i - 1) * 8 + j]
+            if square == 'O':
+                W_score += tile_score[i][j]
+                W_markers += 1
+            elif square == 'X':
+                B_score += tile_score[i][j]
+                B_markers += 1
+    if W_markers > 5 and B_markers > 5:
+        W_score -= W_markers
+        B_score -= B_markers
+    if W_markers <= 3:
+        W_score += 2 * W_markers
+    if B_markers <= 3:
+        B_score += 2 * B_markers
+    return W_score if position_str[0] == 'W' else -B_score
+
+
+def check_evaluator(evaluator_class, reference, game_positions):
+    plain = evaluator_class()
+    incremental = evaluator_class(incremental=True)
+    positions = [OthelloPosition(position_str) for position_str in game_positions]
+    expected = [reference(position_str) for position_str in game_positions]
+
+    assert [plain.evaluate(position, None) for position in positions] == expected
+    assert plain.evaluate_batch(positions) == expected
+
+    # Weight sums kept up to date by apply and undo, two plies deep
+    for position_str in game_positions[::10]:
+        tracked = OthelloPosition(position_str)
+        incremental.prepare(tracked)
+        for action in tracked.get_moves()[1]:
+            tracked.apply(action)
+            assert incremental.evaluate(tracked, None) == reference(tracked.to_string())
+            for reply in tracked.get_moves()[1]:
+                tracked.apply(reply)
+                assert incremental.evaluate(tracked, None) == reference(tracked.to_string())
+                tracked.undo()
+            tracked.undo()
+        assert incremental.evaluate(tracked, None) == reference(position_str)
+
+
+def test_super_smart_evaluator(game_positions):
+    check_evaluator(SuperSmartEvaluator, reference_super_smart, game_positions)
+
+
+def test_early_game_evaluator(game_positions):
+    check_evaluator(EarlyGameEvalutor, reference_early_game, game_positions)